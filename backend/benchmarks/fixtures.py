@@ -0,0 +1,118 @@
+"""
+Synthetic inputs for the offline benchmarks.
+
+PDFs are written by hand (no reportlab needed) so their size and layout are
+fully controlled: every page holds `lines_per_page` lines of `words_per_line` generated words.
+"""
+import random
+
+WORDS = (
+    "agreement party clause term payment invoice delivery notice schedule section "
+    "liability warranty obligation period service customer supplier data report "
+    "analysis result method system model value process record contract annex"
+).split()
+
+
+def make_sentence(rng: random.Random, words: int = 12) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_page_lines(rng: random.Random, lines_per_page: int, words_per_line: int = 12) -> list[str]:
+    return [make_sentence(rng, words_per_line) for _ in range(lines_per_page)]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(num_pages: int, lines_per_page: int = 40, seed: int = 0, words_per_line: int = 12) -> bytes:
+    """Build a valid PDF with `num_pages` pages of `lines_per_page` generated lines"""
+    rng = random.Random(seed)
+    objects: list[bytes] = []
+
+    # 1: catalog, 2: page tree, 3: font; pages and contents follow in pairs
+    page_ids = [4 + 2 * i for i in range(num_pages)]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {num_pages} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    for i, page_id in enumerate(page_ids):
+        lines = make_page_lines(rng, lines_per_page, words_per_line)
+        body = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(
+            f"({_escape(f'[{i + 1}] ' + line)}) '" for line in lines
+        ) + " ET"
+        stream = body.encode("latin-1")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode()
+        )
+        objects.append(
+            f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream"
+        )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + obj + b"\nendobj\n"
+
+    xref_offset = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n".encode()
+    out += b"0000000000 65535 f \n"
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def make_chunk_corpus(num_chunks: int, seed: int = 0) -> tuple[list[str], list[str]]:
+    """
+    Synthetic chunk corpus: generated prose where every chunk also mentions a
+    unique section number and reference code, as real contracts and reports do.
+
+    Returns:
+        (texts, identifiers), where identifiers[i] is the reference code of chunk i
+    """
+    rng = random.Random(seed)
+    texts, identifiers = [], []
+    for i in range(num_chunks):
+        code = f"{rng.choice('ABCDEFGHKMNPRSTXZ')}{rng.choice('ABCDEFGHKMNPRSTXZ')}-{rng.randint(1000, 9999)}-{i}"
+        section = f"{rng.randint(1, 20)}.{rng.randint(1, 20)}.{i}"
+        sentences = [make_sentence(rng) for _ in range(6)]
+        sentences.insert(rng.randint(0, 6), f"Section {section} applies to reference {code}.")
+        texts.append(" ".join(sentences))
+        identifiers.append(code)
+    return texts, identifiers
+
+
+class HashingEmbeddingFunction:
+    """
+    Deterministic offline stand-in for the sentence-transformer model: a
+    normalised bag of hashed words. Good enough to exercise Chroma's HNSW
+    index without downloading a model.
+    """
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+
+    def __call__(self, input):
+        import hashlib
+        import math
+        import re
+
+        vectors = []
+        for text in input:
+            vector = [0.0] * self.dimensions
+            for word in re.findall(r"\w+", text.lower()):
+                vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dimensions] += 1.0
+            norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+            vectors.append([v / norm for v in vector])
+        return vectors
+
+    @staticmethod
+    def name() -> str:
+        return "hashing"
+
+    def is_legacy(self) -> bool:
+        return True
@@ -0,0 +1,365 @@
+"""
+Drive a mixed workload against backend_app in-process and report latency
+percentiles, throughput and a per-stage breakdown.
+
+Nothing external is needed: Gemini is replaced by the fake LLM provider with
+configurable latency and streaming (still subject to the LLM quota), S3 by the in-memory storage backend, the
+database by a local SQLite file (or --database-url, e.g. a local Postgres),
+and the embedding model by the hashing stand-in.
+
+Requests are issued open-loop at --rate per second for --duration seconds and
+each latency is measured from the request's scheduled start, so a server that
+falls behind shows up as queueing instead of a lower request rate.
+
+    python -m benchmarks.load_test [--rate 20] [--duration 30]
+        [--mix login=1,upload=1,query=6,stream=1,chats=2] [--llm-latency-ms 300]
+"""
+from collections import defaultdict
+from typing import Dict, List
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import pkgutil
+import random
+import re
+import statistics
+import tempfile
+import time
+
+from benchmarks.fixtures import HashingEmbeddingFunction, make_pdf, make_sentence
+
+DEFAULT_MIX = "login=1,upload=1,query=6,stream=1,chats=2"
+PASSWORD = "load-test-password"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    if not latencies:
+        return {}
+    return {
+        "mean": round(statistics.mean(latencies), 2),
+        "p50": round(percentile(latencies, 0.50), 2),
+        "p95": round(percentile(latencies, 0.95), 2),
+        "p99": round(percentile(latencies, 0.99), 2),
+        "max": round(max(latencies), 2),
+    }
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    unknown = set(weights) - set(OPERATIONS)
+    if unknown:
+        raise SystemExit(f"Unknown operations in --mix: {', '.join(sorted(unknown))}")
+    return weights
+
+
+def configure_environment(args) -> str:
+    """Point every backend dependency at local stand-ins; must run before importing src"""
+    workdir = tempfile.mkdtemp(prefix="load-test-")
+    # Chroma, the embedding/summary caches and the BM25 index use relative paths
+    os.chdir(workdir)
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite+aiosqlite:///{workdir}/load_test.db"
+    os.environ["STORAGE_BACKEND"] = "memory"
+    os.environ.setdefault("JWT_SECRET_KEY", "load-test-secret")
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+    if args.bcrypt_rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    return workdir
+
+
+# Histogram samples in the /metrics output
+_SAMPLE = re.compile(r'^(askpdf_\w+?)_(bucket|sum|count)\{([^}]*)\} (\S+)$')
+
+
+def parse_stage_histograms(text: str) -> Dict[tuple, Dict]:
+    """(metric, stage) -> {"buckets": {le: count}, "sum": s, "count": n} for the stage histograms"""
+    histograms: Dict[tuple, Dict] = defaultdict(lambda: {"buckets": {}, "sum": 0.0, "count": 0})
+    for line in text.splitlines():
+        match = _SAMPLE.match(line)
+        if not match or not match.group(1).endswith("_stage_seconds"):
+            continue
+        metric, kind, raw_labels, value = match.groups()
+        labels = dict(re.findall(r'(\w+)="([^"]*)"', raw_labels))
+        entry = histograms[(metric, labels.get("stage", ""))]
+        if kind == "bucket":
+            entry["buckets"][float(labels["le"])] = float(value)
+        else:
+            entry[kind] = float(value)
+    return histograms
+
+
+def stage_breakdown(before: Dict[tuple, Dict], after: Dict[tuple, Dict]) -> Dict[str, Dict]:
+    """Per-stage mean and bucket-estimated percentiles (ms) for observations made during the run"""
+    breakdown: Dict[str, Dict] = defaultdict(dict)
+    for (metric, stage), entry in after.items():
+        start = before.get((metric, stage), {"buckets": {}, "sum": 0.0, "count": 0})
+        count = entry["count"] - start["count"]
+        if count <= 0:
+            continue
+        buckets = sorted(
+            (le, cumulative - start["buckets"].get(le, 0)) for le, cumulative in entry["buckets"].items()
+        )
+
+        def upper_bound(pct: float):
+            for le, cumulative in buckets:
+                if cumulative >= pct * count:
+                    return round(le * 1000, 1) if le != float("inf") else "+Inf"
+            return "+Inf"
+
+        pipeline = metric.replace("askpdf_", "").replace("_stage_seconds", "")
+        breakdown[pipeline][stage] = {
+            "count": int(count),
+            "mean_ms": round((entry["sum"] - start["sum"]) / count * 1000, 2),
+            "p50_ms_le": upper_bound(0.50),
+            "p95_ms_le": upper_bound(0.95),
+            "p99_ms_le": upper_bound(0.99),
+        }
+    return dict(breakdown)
+
+
+class LoadTest:
+    def __init__(self, client, args):
+        self.client = client
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.users: List[Dict] = []  # {"username", "headers", "projects": [...]}
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.query_stages: Dict[str, List[float]] = defaultdict(list)
+        self.answer_sources: Dict[str, int] = defaultdict(int)
+        self.uploads = 0
+
+    async def login(self, username: str) -> Dict[str, str]:
+        response = await self.client.post("/login", data={"username": username, "password": PASSWORD})
+        response.raise_for_status()
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def create_project(self, headers: Dict[str, str]):
+        self.uploads += 1
+        seed = 0 if self.args.duplicate_uploads else self.uploads
+        pdf_content = make_pdf(self.args.pdf_pages, seed=seed)
+        return await self.client.post(
+            "/createProject",
+            headers=headers,
+            data={"title": f"Load test {self.uploads}", "description": "Generated"},
+            files={"pdf_file": (f"load-{self.uploads}.pdf", pdf_content, "application/pdf")}
+        )
+
+    async def wait_until_ingested(self, headers: Dict[str, str], project_id: int) -> str:
+        while True:
+            response = await self.client.get(f"/projects/{project_id}/ingestion", headers=headers)
+            status = response.json().get("status")
+            if status in ("DONE", "FAILED"):
+                return status
+            await asyncio.sleep(0.05)
+
+    async def setup(self) -> None:
+        """Sign up the users and give each one ingested project to query"""
+        for i in range(self.args.users):
+            username = f"load-user-{i}"
+            await self.client.post("/signup", json={"username": username, "password": PASSWORD})
+            headers = await self.login(username)
+            response = await self.create_project(headers)
+            response.raise_for_status()
+            project_id = response.json()["id"]
+            status = await self.wait_until_ingested(headers, project_id)
+            if status != "DONE":
+                raise SystemExit(f"Ingestion of the setup project {project_id} failed")
+            self.users.append({"username": username, "headers": headers, "projects": [project_id]})
+
+    async def check_answer_cache(self) -> List[str]:
+        """Ask one question three times in a row and return where each answer came from"""
+        user = self.users[0]
+        project_id = user["projects"][0]
+        payload = {"query": "When is payment due?", "top_k": self.args.top_k}
+        sources = []
+        for _ in range(3):
+            response = await self.client.post(f"/query/{project_id}", headers=user["headers"], json=payload)
+            response.raise_for_status()
+            sources.append(response.json().get("answer_source"))
+        return sources
+
+    def query_payload(self) -> Dict:
+        return {"query": make_sentence(self.rng, 8), "top_k": self.args.top_k}
+
+    async def op_login(self, user):
+        response = await self.client.post("/login", data={"username": user["username"], "password": PASSWORD})
+        return response.status_code
+
+    async def op_upload(self, user):
+        response = await self.create_project(user["headers"])
+        return response.status_code
+
+    async def op_query(self, user):
+        project_id = self.rng.choice(user["projects"])
+        response = await self.client.post(f"/query/{project_id}", headers=user["headers"], json=self.query_payload())
+        if response.status_code < 300:
+            body = response.json()
+            self.answer_sources[body.get("answer_source", "unknown")] += 1
+            for stage, ms in body.get("timings_ms", {}).items():
+                self.query_stages[stage.removesuffix("_ms")].append(ms)
+        return response.status_code
+
+    async def op_stream(self, user):
+        project_id = self.rng.choice(user["projects"])
+        async with self.client.stream(
+            "POST", f"/query/{project_id}/stream", headers=user["headers"], json=self.query_payload()
+        ) as response:
+            await response.aread()
+            return response.status_code
+
+    async def op_chats(self, user):
+        project_id = self.rng.choice(user["projects"])
+        response = await self.client.get(f"/chats/{project_id}", headers=user["headers"])
+        return response.status_code
+
+    async def issue(self, name: str, scheduled: float, limit: asyncio.Semaphore) -> None:
+        async with limit:
+            user = self.rng.choice(self.users)
+            try:
+                status = await OPERATIONS[name](self, user)
+            except Exception:
+                status = 0  # Transport error or timeout
+        self.latencies[name].append((time.perf_counter() - scheduled) * 1000)
+        self.statuses[name][status] += 1
+
+    async def run(self) -> float:
+        """Issue requests open-loop for the configured duration; returns the elapsed seconds"""
+        weights = parse_mix(self.args.mix)
+        names, ratios = list(weights), list(weights.values())
+        limit = asyncio.Semaphore(self.args.max_in_flight)
+        tasks = []
+        started = time.perf_counter()
+        next_at = started
+        while next_at - started < self.args.duration:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            name = self.rng.choices(names, weights=ratios)[0]
+            tasks.append(asyncio.create_task(self.issue(name, next_at, limit)))
+            next_at += self.rng.expovariate(self.args.rate) if self.args.poisson else 1 / self.args.rate
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - started
+
+    def report(self, elapsed: float) -> Dict:
+        operations = {}
+        total = 0
+        for name, latencies in sorted(self.latencies.items()):
+            statuses = self.statuses[name]
+            errors = sum(count for status, count in statuses.items() if not 200 <= status < 300)
+            total += len(latencies)
+            operations[name] = {
+                "requests": len(latencies),
+                "errors": errors,
+                "statuses": {str(status): count for status, count in sorted(statuses.items())},
+                "throughput_rps": round(len(latencies) / elapsed, 2),
+                "latency_ms": summarize(latencies),
+            }
+        return {
+            "duration_seconds": round(elapsed, 2),
+            "target_rps": self.args.rate,
+            "achieved_rps": round(total / elapsed, 2),
+            "operations": operations,
+            "query_stages_ms": {stage: summarize(values) for stage, values in sorted(self.query_stages.items())},
+            "answer_sources": dict(sorted(self.answer_sources.items())),
+        }
+
+
+OPERATIONS = {
+    "login": LoadTest.op_login,
+    "upload": LoadTest.op_upload,
+    "query": LoadTest.op_query,
+    "stream": LoadTest.op_stream,
+    "chats": LoadTest.op_chats,
+}
+
+
+async def main(args) -> Dict:
+    configure_environment(args)
+    parse_mix(args.mix)
+
+    import httpx
+    import src.database.models as models
+    from src.database.base import Base
+    from src.database.db import engine
+    from src.main import backend_app
+    from src.services.answer_cache import answer_cache
+    from src.services.llm_provider import FakeProvider, llm_quota, set_llm_provider
+    from src.services.vector_store import vector_store_registry
+
+    for module in pkgutil.iter_modules(models.__path__):
+        importlib.import_module(f"{models.__name__}.{module.name}")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    fake_provider = FakeProvider(
+        latency_ms=args.llm_latency_ms,
+        jitter_ms=args.llm_jitter_ms,
+        chunks=args.llm_chunks,
+        chunk_delay_ms=args.llm_chunk_delay_ms
+    )
+    # Every LLMSummarizer, including the ones built by ingestion jobs, talks to the fake
+    set_llm_provider(fake_provider)
+    vector_store_registry.register_embedding_function("all-MiniLM-L6-v2", HashingEmbeddingFunction())
+
+    transport = httpx.ASGITransport(app=backend_app)
+    # Close the database connections even when a check aborts the run
+    try:
+        async with backend_app.router.lifespan_context(backend_app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=args.timeout) as client:
+                load_test = LoadTest(client, args)
+                await load_test.setup()
+                repeat_sources = await load_test.check_answer_cache()
+                before = parse_stage_histograms((await client.get("/metrics")).text)
+                elapsed = await load_test.run()
+                after = parse_stage_histograms((await client.get("/metrics")).text)
+    finally:
+        await engine.dispose()
+
+    report = load_test.report(elapsed)
+    report["stages_ms"] = stage_breakdown(before, after)
+    report["llm"] = {"provider_calls": fake_provider.calls, **llm_quota.stats()}
+    report["answer_cache"] = {"sequential_repeat": repeat_sources, **answer_cache.stats()}
+    report["config"] = {
+        key: value for key, value in vars(args).items() if key not in ("output", "database_url")
+    }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=20, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of load after setup")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Operation weights, e.g. query=6,upload=1")
+    parser.add_argument("--poisson", action="store_true", help="Exponential inter-arrival times")
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--pdf-pages", type=int, default=5)
+    parser.add_argument("--duplicate-uploads", action="store_true", help="Upload identical PDFs to exercise deduplication")
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="Fake LLM time to first token")
+    parser.add_argument("--llm-jitter-ms", type=float, default=100)
+    parser.add_argument("--llm-chunks", type=int, default=20, help="Streamed pieces per answer")
+    parser.add_argument("--llm-chunk-delay-ms", type=float, default=10)
+    parser.add_argument("--bcrypt-rounds", type=int, help="Defaults to the app's BCRYPT_ROUNDS")
+    parser.add_argument("--database-url", help="Defaults to a SQLite file in a temporary directory")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,63 @@
+"""
+Measure login throughput (password verifications per second) for the bcrypt
+scheme used by authenticate_user and the bcrypt+argon2 scheme of
+security/hashing/hash.py, with 1 worker and with one worker per core.
+
+    python -m benchmarks.password_hashing [--logins 64] [--rounds 12]
+"""
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import json
+import os
+import time
+
+
+def throughput(verify, logins: int, workers: int) -> float:
+    """Verifications per second with `workers` threads"""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda _: verify(), range(workers)))  # warm up
+        start = time.perf_counter()
+        results = list(pool.map(lambda _: verify(), range(logins)))
+        elapsed = time.perf_counter() - start
+    assert all(results)
+    return logins / elapsed
+
+
+def run(logins: int, rounds: int) -> list[dict]:
+    from src.security.hashing.hash import HashGenerator
+    from src.security.hashing.hasher import PasswordHasher
+
+    password = "correct horse battery staple"
+
+    bcrypt_context = PasswordHasher(rounds=rounds)._context
+    bcrypt_hash = bcrypt_context.hash(password)
+
+    layered = HashGenerator()
+    salt = layered.generate_password_salt_hash
+    layered_hash = layered.generate_password_hash(hash_salt=salt, password=password)
+
+    schemes = {
+        f"bcrypt (rounds={rounds})": lambda: bcrypt_context.verify(password, bcrypt_hash),
+        "bcrypt+argon2": lambda: layered.is_password_verified(password=salt + password, hashed_password=layered_hash),
+    }
+    cores = os.cpu_count() or 1
+    results = []
+    for name, verify in schemes.items():
+        for workers in sorted({1, cores}):
+            logins_per_second = throughput(verify, logins, workers)
+            results.append({
+                "scheme": name,
+                "workers": workers,
+                "logins_per_second": round(logins_per_second, 2),
+                "logins_per_second_per_core": round(logins_per_second / min(workers, cores), 2),
+                "ms_per_login": round(1000 * workers / logins_per_second, 2),
+            })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=int(os.getenv("BCRYPT_ROUNDS", 12)))
+    args = parser.parse_args()
+    print(json.dumps(run(args.logins, args.rounds), indent=2))
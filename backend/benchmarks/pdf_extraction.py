@@ -0,0 +1,67 @@
+"""
+Compare serial PDF text extraction (the original PDFParser loop) with the
+parallel page-range extraction in PDFParser.extract_pages_from_bytes.
+
+    python -m benchmarks.pdf_extraction [--pages 10 100 1000] [--repeat 3]
+"""
+from io import BytesIO
+import argparse
+import asyncio
+import json
+import time
+import PyPDF2
+
+from benchmarks.fixtures import make_pdf
+from src.services.executors import executors
+from src.services.pdf_parser import PDFParser
+
+
+def serial_extract(pdf_content: bytes) -> str:
+    """The previous implementation: one page at a time with string concatenation"""
+    pdf_reader = PyPDF2.PdfReader(BytesIO(pdf_content))
+    text = ""
+    for page in pdf_reader.pages:
+        text += page.extract_text() or ""
+    return text
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(pages: list[int], repeat: int) -> list[dict]:
+    loop = asyncio.new_event_loop()
+    # Warm up the process pool so its start-up cost is not counted
+    loop.run_until_complete(PDFParser.extract_pages_from_bytes(make_pdf(1)))
+
+    results = []
+    for num_pages in pages:
+        pdf_content = make_pdf(num_pages)
+        serial = best_of(repeat, lambda: serial_extract(pdf_content))
+        parallel = best_of(
+            repeat,
+            lambda: loop.run_until_complete(PDFParser.extract_pages_from_bytes(pdf_content))
+        )
+        results.append({
+            "pages": num_pages,
+            "bytes": len(pdf_content),
+            "serial_seconds": round(serial, 4),
+            "parallel_seconds": round(parallel, 4),
+            "speedup": round(serial / parallel, 2) if parallel else None,
+            "workers": executors["parsing"].max_workers,
+        })
+    loop.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(run(args.pages, args.repeat), indent=2))
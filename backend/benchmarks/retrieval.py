@@ -0,0 +1,80 @@
+"""
+Compare dense-only and hybrid (BM25 + dense, reciprocal rank fusion) retrieval
+on a fixed offline query set.
+
+Queries ask about the reference code of a chunk, sometimes together with a few
+words from its text; the chunk holding the code is the relevant result.
+Embeddings come from a hashing stand-in, so no model download is needed.
+
+    python -m benchmarks.retrieval [--chunks 2000] [--queries 200] [--k 4]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.fixtures import HashingEmbeddingFunction, make_chunk_corpus
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+
+
+async def run(num_chunks: int, num_queries: int, k: int) -> dict:
+    workdir = tempfile.mkdtemp(prefix="retrieval-bench-")
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(workdir, "embeddings.sqlite3")
+    os.environ["LEXICAL_INDEX_PATH"] = os.path.join(workdir, "bm25.sqlite3")
+
+    from src.services.vector_store import VectorStore, vector_store_registry
+
+    model_name = "hashing-benchmark"
+    vector_store_registry.register_embedding_function(model_name, HashingEmbeddingFunction())
+    store = VectorStore("bench", persist_directory=os.path.join(workdir, "chroma"), embedding_model_name=model_name)
+
+    texts, identifiers = make_chunk_corpus(num_chunks)
+    for start in range(0, num_chunks, 256):
+        await store.add_texts(
+            texts=texts[start:start + 256],
+            metadatas=[{"chunk_index": i} for i in range(start, min(start + 256, num_chunks))],
+            ids=[str(i) for i in range(start, min(start + 256, num_chunks))]
+        )
+
+    rng = random.Random(1)
+    queries = []
+    for target in rng.sample(range(num_chunks), num_queries):
+        words = texts[target].split()
+        context = " ".join(rng.sample(words, 3)) if rng.random() < 0.5 else ""
+        queries.append((f"What does reference {identifiers[target]} say? {context}".strip(), str(target)))
+
+    modes = {
+        "dense": lambda q: asyncio.to_thread(store.similarity_search, q, k),
+        "hybrid": lambda q: store.hybrid_search(q, k),
+    }
+    report = {"chunks": num_chunks, "queries": num_queries, "k": k}
+    for mode, search in modes.items():
+        latencies, hits = [], 0
+        for query, relevant in queries:
+            start = time.perf_counter()
+            results = await search(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += any(doc["id"] == relevant for doc in results)
+        report[mode] = {
+            f"recall@{k}": round(hits / num_queries, 3),
+            "latency_ms_mean": round(statistics.mean(latencies), 2),
+            "latency_ms_p95": round(percentile(latencies, 0.95), 2),
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.chunks, args.queries, args.k)), indent=2))
@@ -0,0 +1,267 @@
+"""
+Offline micro-benchmarks for the services layer: PDF extraction, chunking,
+embedding by batch size and similarity_search latency by collection size.
+
+Everything runs locally on generated inputs. Embeddings come from the hashing
+stand-in unless --embedding-model names a sentence-transformer model that is
+already in the local cache. Results are written as JSON, tagged with the git
+commit, so runs can be compared across commits:
+
+    python -m benchmarks.suite [--quick] [--output results.json] [--compare baseline.json]
+"""
+from typing import Callable, Dict, List
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+
+from benchmarks.fixtures import HashingEmbeddingFunction, make_chunk_corpus, make_pdf
+
+# (pages, lines per page, words per line): short lines, a typical page, dense pages
+PDF_LAYOUTS = [(10, 40, 12), (100, 40, 12), (100, 80, 20), (500, 40, 12)]
+CHUNK_TEXT_CHARS = [100_000, 1_000_000, 5_000_000]
+EMBEDDING_BATCH_SIZES = [1, 8, 32, 128]
+SEARCH_COLLECTION_SIZES = [1_000, 10_000, 100_000]
+
+QUICK = {
+    "layouts": [(10, 40, 12), (50, 80, 20)],
+    "chars": [100_000, 500_000],
+    "batch_sizes": [1, 32],
+    "collection_sizes": [1_000, 5_000],
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+
+
+def best_of(repeat: int, fn: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def bench_extraction(layouts: list, repeat: int) -> List[Dict]:
+    from src.services.pdf_parser import PDFParser
+
+    loop = asyncio.new_event_loop()
+    # Warm up the process pool so its start-up cost is not counted
+    loop.run_until_complete(PDFParser.extract_pages_from_bytes(make_pdf(1)))
+
+    results = []
+    for pages, lines_per_page, words_per_line in layouts:
+        pdf_content = make_pdf(pages, lines_per_page=lines_per_page, words_per_line=words_per_line)
+        seconds = best_of(
+            repeat, lambda: loop.run_until_complete(PDFParser.extract_pages_from_bytes(pdf_content))
+        )
+        results.append({
+            "pages": pages,
+            "lines_per_page": lines_per_page,
+            "words_per_line": words_per_line,
+            "bytes": len(pdf_content),
+            "seconds": round(seconds, 4),
+            "pages_per_second": round(pages / seconds, 1),
+            "mb_per_second": round(len(pdf_content) / seconds / 1e6, 2),
+        })
+    loop.close()
+    return results
+
+
+def bench_chunking(sizes: List[int], repeat: int) -> List[Dict]:
+    from src.services.text_chunker import TextChunker
+
+    chunker = TextChunker()
+    texts, _ = make_chunk_corpus(max(sizes) // 400 + 1)
+    corpus = "\n".join(texts)
+
+    results = []
+    for chars in sizes:
+        text = corpus[:chars]
+        # Pages of ~3000 characters, as the ingestion pipeline feeds them
+        pages = [text[i:i + 3000] for i in range(0, len(text), 3000)]
+        whole = best_of(repeat, lambda: chunker.chunk_text(text))
+        streamed = best_of(repeat, lambda: list(chunker.iter_chunks(pages)))
+        results.append({
+            "chars": len(text),
+            "chunks": len(chunker.chunk_text(text)),
+            "chunk_text_seconds": round(whole, 4),
+            "chunk_text_mb_per_second": round(len(text) / whole / 1e6, 2),
+            "streamed_seconds": round(streamed, 4),
+            "streamed_mb_per_second": round(len(text) / streamed / 1e6, 2),
+        })
+    return results
+
+
+def bench_embedding(embedding_func, batch_sizes: List[int], texts_per_size: int) -> List[Dict]:
+    texts, _ = make_chunk_corpus(texts_per_size, seed=1)
+    embedding_func(texts[:max(batch_sizes)])  # warm up
+
+    results = []
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        for i in range(0, len(texts), batch_size):
+            embedding_func(texts[i:i + batch_size])
+        elapsed = time.perf_counter() - start
+        results.append({
+            "batch_size": batch_size,
+            "texts": len(texts),
+            "seconds": round(elapsed, 4),
+            "texts_per_second": round(len(texts) / elapsed, 1),
+        })
+    return results
+
+
+async def bench_search(model_name: str, embedding_func, sizes: List[int], queries: int, k: int, workdir: str) -> List[Dict]:
+    from src.services.vector_store import VectorStore
+
+    texts, identifiers = make_chunk_corpus(max(sizes))
+    embeddings: List[List[float]] = []
+    for start in range(0, len(texts), 1000):
+        embeddings.extend(list(map(float, vector)) for vector in embedding_func(texts[start:start + 1000]))
+
+    results = []
+    for size in sizes:
+        store = VectorStore(
+            f"bench_{size}",
+            persist_directory=os.path.join(workdir, "chroma"),
+            embedding_model_name=model_name
+        )
+        start = time.perf_counter()
+        for offset in range(0, size, 1000):
+            end = min(offset + 1000, size)
+            await store.add_texts(
+                texts=texts[offset:end],
+                metadatas=[{"chunk_index": i} for i in range(offset, end)],
+                ids=[str(i) for i in range(offset, end)],
+                embeddings=embeddings[offset:end]
+            )
+        index_seconds = time.perf_counter() - start
+
+        rng = random.Random(size)
+        targets = [rng.randrange(size) for _ in range(queries)]
+        store.similarity_search(f"What does reference {identifiers[targets[0]]} say?", k)  # warm up
+        latencies = []
+        for target in targets:
+            start = time.perf_counter()
+            store.similarity_search(f"What does reference {identifiers[target]} say?", k)
+            latencies.append((time.perf_counter() - start) * 1000)
+        results.append({
+            "chunks": size,
+            "k": k,
+            "queries": queries,
+            "index_seconds": round(index_seconds, 2),
+            "latency_ms_mean": round(statistics.mean(latencies), 3),
+            "latency_ms_p50": round(percentile(latencies, 0.50), 3),
+            "latency_ms_p95": round(percentile(latencies, 0.95), 3),
+            "latency_ms_p99": round(percentile(latencies, 0.99), 3),
+        })
+        store.delete_project_collection()
+    return results
+
+
+def run(args) -> Dict:
+    workdir = tempfile.mkdtemp(prefix="services-bench-")
+    # Keep the embedding cache and BM25 index of the run out of the real ones
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(workdir, "embeddings.sqlite3")
+    os.environ["LEXICAL_INDEX_PATH"] = os.path.join(workdir, "bm25.sqlite3")
+
+    from src.services.vector_store import vector_store_registry
+
+    if args.embedding_model == "hashing":
+        model_name = "hashing-benchmark"
+        vector_store_registry.register_embedding_function(model_name, HashingEmbeddingFunction())
+    else:
+        # Must already be downloaded; the suite never goes to the network
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        model_name = args.embedding_model
+    embedding_func = vector_store_registry.get_embedding_function(model_name)
+
+    layouts = QUICK["layouts"] if args.quick else PDF_LAYOUTS
+    chars = QUICK["chars"] if args.quick else CHUNK_TEXT_CHARS
+    batch_sizes = args.batch_sizes or (QUICK["batch_sizes"] if args.quick else EMBEDDING_BATCH_SIZES)
+    collection_sizes = args.chunks or (QUICK["collection_sizes"] if args.quick else SEARCH_COLLECTION_SIZES)
+
+    report = {
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "embedding_model": args.embedding_model,
+    }
+    report["extraction"] = bench_extraction(layouts, args.repeat)
+    report["chunking"] = bench_chunking(chars, args.repeat)
+    report["embedding"] = bench_embedding(embedding_func, batch_sizes, args.embedding_texts)
+    report["search"] = asyncio.run(
+        bench_search(model_name, embedding_func, collection_sizes, args.queries, args.k, workdir)
+    )
+    return report
+
+
+def compare(current: Dict, baseline: Dict) -> Dict:
+    """Ratio current/baseline for every timing and throughput figure present in both runs"""
+    keys = {
+        "extraction": ("pages", "lines_per_page", "words_per_line"),
+        "chunking": ("chars",),
+        "embedding": ("batch_size",),
+        "search": ("chunks", "k"),
+    }
+    ratios = {}
+    for section, key_fields in keys.items():
+        previous = {tuple(row[f] for f in key_fields): row for row in baseline.get(section, [])}
+        for row in current.get(section, []):
+            key = tuple(row[f] for f in key_fields)
+            if key not in previous:
+                continue
+            label = f"{section}[{','.join(map(str, key))}]"
+            for field, value in row.items():
+                before = previous[key].get(field)
+                if field in key_fields or not isinstance(value, (int, float)) or not before:
+                    continue
+                ratios[f"{label}.{field}"] = round(value / before, 3)
+    return {"baseline_commit": baseline.get("commit"), "ratios": ratios}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="Smaller inputs for a fast sanity run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--embedding-model", default="hashing")
+    parser.add_argument("--embedding-texts", type=int, default=512)
+    parser.add_argument("--batch-sizes", type=int, nargs="+")
+    parser.add_argument("--chunks", type=int, nargs="+", help="Collection sizes for similarity_search")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--output", help="Defaults to benchmarks/results/<commit>.json")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.compare:
+        with open(args.compare) as f:
+            report["comparison"] = compare(report, json.load(f))
+
+    output = args.output or os.path.join(os.path.dirname(__file__), "results", f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,58 @@
+from collections import OrderedDict
+from typing import Dict, Tuple
+import os
+import threading
+import time
+
+
+class OwnershipCache:
+    """
+    Short-lived LRU of confirmed (user_id, project_id) ownerships.
+
+    Only positive checks are cached, and each entry expires after `ttl_seconds`,
+    so a cache in another worker process is stale for at most that long after
+    a project is deleted. Deletes in this process invalidate immediately.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 10_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Tuple[int, int], float] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def is_owner(self, user_id: int, project_id: int) -> bool:
+        key = (user_id, project_id)
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is not None and expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+            if expires_at is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False
+
+    def add(self, user_id: int, project_id: int) -> None:
+        with self._lock:
+            self._entries[(user_id, project_id)] = time.monotonic() + self.ttl_seconds
+            self._entries.move_to_end((user_id, project_id))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_project(self, project_id: int) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == project_id]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+ownership_cache = OwnershipCache(
+    ttl_seconds=float(os.getenv("OWNERSHIP_CACHE_TTL_SECONDS", 30)),
+    max_entries=int(os.getenv("OWNERSHIP_CACHE_MAX_ENTRIES", 10_000))
+)
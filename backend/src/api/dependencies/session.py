@@ -1,8 +1,11 @@
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from ...database.db import get_db  # Your async DB session generator
+from ...database.db import get_db, get_read_db  # Your async DB session generators
 
 async def get_database_session(db: AsyncSession = Depends(get_db)):
     """Injects a database session into routes"""
     return db
 
+async def get_read_database_session(db: AsyncSession = Depends(get_read_db)):
+    """Injects a read-replica session into read-only routes"""
+    return db
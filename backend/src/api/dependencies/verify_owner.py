@@ -1,66 +1,61 @@
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from src.security.jwt  import jwt_generator
-from src.database.crud.project import get_project
-from fastapi.security import OAuth2PasswordBearer
+from src.security.jwt import get_current_user
+from src.database.crud.project import get_project_owner_id
+from .ownership_cache import ownership_cache
 from .session import get_database_session
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
-
 async def verify_project_owner(
     project_id: int,
-    token: str = Depends(oauth2_scheme),
+    user_data: dict = Depends(get_current_user),
     db: Session = Depends(get_database_session)  # Assuming you have a get_db dependency
 ) -> dict:
     """
     Dependency to verify that the current user is the owner of the specified project.
-    
+
+    The token is decoded by get_current_user, which FastAPI resolves once per
+    request, so routes should depend on this alone rather than on both.
+    Confirmed ownerships are cached briefly to skip the project lookup.
+
     Args:
         project_id: ID of the project to check
-        token: JWT token for authentication
+        user_data: Decoded token of the current user
         db: Database session
-    
+
     Returns:
         The user data if verification succeeds
-    
+
     Raises:
         HTTPException(401) if token is invalid or user doesn't own the project
         HTTPException(404) if project doesn't exist
     """
-    try:
-        # Get current user from token
-        user_data = jwt_generator.retrieve_details_from_token(token)
-        user_id = user_data.get("user_id")  # Assuming your token has an "id" field
-        
-        if not user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token: missing user ID",
-                headers={"WWW-Authenticate": "Bearer"}
-            )
-        
-        # Get project from database
-        project = await get_project(db=db, project_id=project_id)
-        
-        if not project:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Project not found"
-            )
-        
-        # Check if user is the owner
-        if project.user_id != user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="You don't have permission to access this project",
-                headers={"WWW-Authenticate": "Bearer"}
-            )
-        
+    user_id = user_data.get("user_id")
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token: missing user ID",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+    if ownership_cache.is_owner(user_id, project_id):
         return user_data
-    
-    except ValueError as e:
+
+    # Only the owner column is needed
+    owner_id = await get_project_owner_id(db=db, project_id=project_id)
+
+    if owner_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
+    # Check if user is the owner
+    if owner_id != user_id:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=str(e),
+            detail="You don't have permission to access this project",
             headers={"WWW-Authenticate": "Bearer"}
-        )
\ No newline at end of file
+        )
+
+    ownership_cache.add(user_id, project_id)
+    return user_data
@@ -5,6 +5,8 @@ from src.api.routes.signup import router as signup_router
 from src.api.routes.project import router as project_router
 from src.api.routes.query import router as query_router
 from src.api.routes.chat import router as chat_router
+from src.api.routes.documents import router as documents_router
+from src.api.routes.metrics import router as metrics_router
 
 router = fastapi.APIRouter()
 
@@ -12,4 +14,6 @@ router.include_router(router=query_router)
 router.include_router(router=login_router)
 router.include_router(router=signup_router)
 router.include_router(router=project_router)
-router.include_router(router=chat_router)
\ No newline at end of file
+router.include_router(router=chat_router)
+router.include_router(router=documents_router)
+router.include_router(router=metrics_router)
\ No newline at end of file
@@ -1,8 +1,7 @@
 from fastapi import APIRouter,status, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from ..dependencies.session import get_database_session
+from ..dependencies.session import get_read_database_session
 from ..dependencies.verify_owner import verify_project_owner
-from src.security.jwt import get_current_user
 from src.database.crud.chats import get_project_chats
 from src.database.schemas import ChatResponse
 
@@ -11,9 +10,8 @@ router = APIRouter()
 @router.get("/chats/{project_id}", status_code=status.HTTP_200_OK, response_model=list[ChatResponse])
 async def fetch_user_chats(
     project_id: int,
-    current_user: dict = Depends(get_current_user),
     user: dict = Depends(verify_project_owner),
-    db: AsyncSession = Depends(get_database_session),
+    db: AsyncSession = Depends(get_read_database_session),
 ) -> list[ChatResponse]:
     """
     Fetch all chat messages for a specific project.
@@ -0,0 +1,129 @@
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated, List
+from ...database.crud.documents import (
+    create_document, get_document, get_project_documents, delete_document_rows, count_s3_key_references,
+    find_project_document
+)
+from ...database.crud.project import delete_file
+from ..dependencies.session import get_database_session
+from ..dependencies.verify_owner import verify_project_owner
+from src.database.schemas import DocumentResponse
+from src.services.pdf_parser import PDFParser
+from src.services.executors import run_blocking
+from src.services.vector_store import VectorStore
+from src.services.answer_cache import answer_cache
+from src.services.ingestion import enqueue_document_ingestion, ensure_ingestion_capacity
+from .project import MAX_PDF_SIZE_MB
+import logging
+
+
+router = APIRouter()
+
+@router.post("/projects/{project_id}/documents", status_code=status.HTTP_202_ACCEPTED)
+async def add_document_endpoint(
+    project_id: int,
+    pdf_file: Annotated[UploadFile, File()],
+    user: dict = Depends(verify_project_owner),
+    db: AsyncSession = Depends(get_database_session)
+):
+    """
+    Add another PDF to an existing project.
+    Only the new document is parsed and embedded; existing vectors are untouched.
+    A PDF that is already in the project is rejected with 409.
+    """
+    try:
+        PDFParser.validate_pdf_file(pdf_file)
+
+        # Read, size-check and hash the upload in one pass
+        pdf_content, content_hash = await PDFParser.read_upload(pdf_file, MAX_PDF_SIZE_MB * 1024 * 1024)
+        await pdf_file.close()
+
+        # The same PDF twice in one project would return every chunk twice
+        existing = await find_project_document(db, project_id, content_hash)
+        if existing:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"This PDF is already in the project (document {existing.id})"
+            )
+
+        ensure_ingestion_capacity()
+        document = await create_document(db, project_id, pdf_file.filename, content_hash)
+        job = await enqueue_document_ingestion(
+            db,
+            project_id=project_id,
+            document_id=document.id,
+            owner_id=user["user_id"],
+            pdf_content=pdf_content,
+            filename=pdf_file.filename,
+            content_hash=content_hash
+        )
+
+        return {
+            "id": document.id,
+            "project_id": project_id,
+            "original_name": document.original_name,
+            "created_at": document.created_at.isoformat(),
+            "job_id": job.id,
+            "status": job.status
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Adding document failed: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to add document"
+        )
+
+@router.get(
+    "/projects/{project_id}/documents",
+    status_code=status.HTTP_200_OK,
+    response_model=List[DocumentResponse]
+)
+async def fetch_project_documents(
+    project_id: int,
+    user: dict = Depends(verify_project_owner),
+    db: AsyncSession = Depends(get_database_session)
+) -> List[DocumentResponse]:
+    """
+    List the documents of a project, oldest first.
+    """
+    documents = await get_project_documents(db, project_id)
+    return [DocumentResponse.model_validate(document) for document in documents]
+
+@router.delete("/projects/{project_id}/documents/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_document_endpoint(
+    project_id: int,
+    document_id: int,
+    user: dict = Depends(verify_project_owner),
+    db: AsyncSession = Depends(get_database_session)
+):
+    """
+    Remove one document from a project: its vectors, its rows and its S3 file
+    unless an identical upload elsewhere still uses it.
+    """
+    document = await get_document(db, document_id)
+    if not document or document.project_id != project_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    try:
+        await run_blocking("embedding", VectorStore(project_id).delete_document, document_id)
+        if document.s3_key and not await count_s3_key_references(
+            db, document.s3_key, exclude_document_id=document_id
+        ):
+            await delete_file(document.s3_key)
+        await delete_document_rows(db, document_id)
+        answer_cache.invalidate_project(project_id)
+
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Failed to delete document: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to delete document"
+        )
@@ -0,0 +1,70 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from src.api.dependencies.ownership_cache import ownership_cache
+from src.database.instrumentation import database_stats
+from src.services.answer_cache import answer_cache
+from src.services.embedding_cache import embedding_cache
+from src.services.executors import executor_stats
+from src.services.ingestion_queue import ingestion_queue
+from src.services.llm_provider import llm_quota
+from src.services.metrics import registry
+from src.services.query_cache import query_embedding_cache, search_result_cache
+from src.services.reranker import reranker
+from src.services.summary_cache import summary_cache
+from src.services.vector_store import vector_store_registry
+
+router = APIRouter(tags=["monitoring"])
+
+
+def _cache_samples(field: str):
+    caches = {
+        "embedding": embedding_cache.stats,
+        "summary": summary_cache.stats,
+        "rerank": reranker.stats,
+        "ownership": ownership_cache.stats,
+        "collection": vector_store_registry.stats,
+        "answer": answer_cache.stats,
+        "query_embedding": query_embedding_cache.stats,
+        "search_result": search_result_cache.stats,
+    }
+    return [({"cache": name}, stats()[field]) for name, stats in caches.items()]
+
+
+def _byte_budget_samples(field: str):
+    caches = {"query_embedding": query_embedding_cache.stats, "search_result": search_result_cache.stats}
+    return [({"cache": name}, stats()[field]) for name, stats in caches.items()]
+
+
+def _executor_samples(field: str):
+    return [({"pool": name}, stats[field]) for name, stats in executor_stats().items()]
+
+
+def _database_samples(field: str, scale: float = 1.0):
+    return [({}, database_stats.stats()[field] * scale)]
+
+
+# Read at scrape time from the counters the components already keep
+registry.add_collector("askpdf_cache_hits_total", "counter", "Cache hits by cache", lambda: _cache_samples("hits"))
+registry.add_collector("askpdf_cache_misses_total", "counter", "Cache misses by cache", lambda: _cache_samples("misses"))
+registry.add_collector("askpdf_cache_bytes", "gauge", "Estimated memory held by byte-budgeted caches", lambda: _byte_budget_samples("bytes"))
+registry.add_collector("askpdf_cache_max_bytes", "gauge", "Byte budget of byte-budgeted caches", lambda: _byte_budget_samples("max_bytes"))
+registry.add_collector("askpdf_answers_coalesced_total", "counter", "Queries that joined an identical query in flight", lambda: [({}, answer_cache.stats()["coalesced"])])
+registry.add_collector("askpdf_executor_in_flight", "gauge", "Calls running or queued per executor pool", lambda: _executor_samples("in_flight"))
+registry.add_collector("askpdf_executor_completed_total", "counter", "Calls completed per executor pool", lambda: _executor_samples("completed"))
+registry.add_collector("askpdf_executor_rejected_total", "counter", "Calls rejected because the pool was saturated", lambda: _executor_samples("rejected"))
+registry.add_collector("askpdf_executor_wait_seconds_max", "gauge", "Longest queue wait per executor pool", lambda: [(labels, value / 1000) for labels, value in _executor_samples("max_wait_ms")])
+registry.add_collector("askpdf_llm_calls_total", "counter", "LLM provider calls, including retries", lambda: [({}, llm_quota.stats()["calls"])])
+registry.add_collector("askpdf_llm_retries_total", "counter", "LLM calls retried after a retryable error", lambda: [({}, llm_quota.stats()["retries"])])
+registry.add_collector("askpdf_llm_failures_total", "counter", "LLM calls that failed for good", lambda: [({}, llm_quota.stats()["failures"])])
+registry.add_collector("askpdf_llm_in_flight", "gauge", "LLM calls currently running", lambda: [({}, llm_quota.stats()["in_flight"])])
+registry.add_collector("askpdf_llm_throttled_seconds_total", "counter", "Time LLM calls waited for the rate limit", lambda: [({}, llm_quota.stats()["throttled_seconds"])])
+registry.add_collector("askpdf_ingestion_jobs_pending", "gauge", "Ingestion jobs waiting for a worker", lambda: [({}, ingestion_queue.pending())])
+registry.add_collector("askpdf_db_queries_total", "counter", "SQL statements executed", lambda: _database_samples("queries"))
+registry.add_collector("askpdf_db_slow_queries_total", "counter", "SQL statements slower than DB_SLOW_QUERY_MS", lambda: _database_samples("slow_queries"))
+registry.add_collector("askpdf_db_pool_checkout_wait_seconds_max", "gauge", "Longest wait for a pooled connection", lambda: _database_samples("max_checkout_wait_ms", 0.001))
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint() -> PlainTextResponse:
+    """Expose process metrics in the Prometheus text format"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,26 +1,32 @@
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Form, status, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from ...database.crud.project import create_project, get_user_projects, delete_project
-from ...database.crud.chats import create_system_chat 
-from ..dependencies.session import get_database_session
+from ...database.crud.ingestion_jobs import get_latest_project_job
+from ...database.crud.documents import create_document
+from ..dependencies.session import get_database_session, get_read_database_session
 from src.security.jwt import get_current_user
 from ..dependencies.verify_owner import verify_project_owner
+from ..dependencies.ownership_cache import ownership_cache
 from typing import Annotated
-from src.database.schemas import ProjectCreate  # Import your schema
+from src.database.schemas import ProjectCreate, IngestionJobResponse  # Import your schema
 from src.services.pdf_parser import PDFParser
-from src.services.text_chunker import TextChunker
 from src.services.vector_store import VectorStore
-from src.services.llm import LLMSummarizer
+from src.services.answer_cache import answer_cache
+from src.services.ingestion import enqueue_document_ingestion, ensure_ingestion_capacity
+from src.services.metrics import failures_total, ingestion_stage_seconds, record_stage
 import logging
+import os
 
 
+# Ingestion streams pages, chunks and embeddings, so memory no longer grows with the PDF
+MAX_PDF_SIZE_MB = int(os.getenv("MAX_PDF_SIZE_MB", 50))
 
 router = APIRouter()
 
 @router.get("/projects", status_code=status.HTTP_200_OK)
 async def fetch_user_projects(
     current_user: dict = Depends(get_current_user),
-    db: AsyncSession = Depends(get_database_session)
+    db: AsyncSession = Depends(get_read_database_session)
 ):
     """
     Fetch all projects belonging to the current authenticated user.
@@ -51,7 +57,7 @@ async def fetch_user_projects(
         )
 
 
-@router.post("/createProject", status_code=status.HTTP_201_CREATED)
+@router.post("/createProject", status_code=status.HTTP_202_ACCEPTED)
 async def create_project_endpoint(
     title: Annotated[str, Form()],
     description: Annotated[str, Form()],
@@ -59,61 +65,50 @@ async def create_project_endpoint(
     current_user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_database_session)
 ):
+    """
+    Create a project and queue its PDF for background ingestion.
+    Returns immediately with the ingestion job id; progress is reported by
+    GET /projects/{project_id}/ingestion.
+    """
     try:
         # Validate PDF file
         PDFParser.validate_pdf_file(pdf_file)
         
-        # Read and validate file size
-        pdf_content = await pdf_file.read()
-        if len(pdf_content) > 10 * 1024 * 1024:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail="File too large (max 10MB)"
-            )
-        await pdf_file.seek(0)
-
-        # Extract text from PDF
-        pdf_text = await PDFParser.extract_text_from_pdf(pdf_file)
+        # Read, size-check and hash the upload in one pass
+        with record_stage(ingestion_stage_seconds, "read_upload"):
+            pdf_content, content_hash = await PDFParser.read_upload(pdf_file, MAX_PDF_SIZE_MB * 1024 * 1024)
+            await pdf_file.close()
 
+        ensure_ingestion_capacity()
 
         # Create project in database
-        project_data = ProjectCreate(title=title, description=description)
-        project = await create_project(
-            db=db,
-            owner_id=current_user["user_id"],
-            project_data=project_data,
-            pdf_file=pdf_file,
-            filename=pdf_file.filename
-        )
-
-        # Initialize services
-        text_chunker = TextChunker()
-        vector_store = VectorStore(project.id)
-        summarizer = LLMSummarizer()
+        with record_stage(ingestion_stage_seconds, "db_write"):
+            project_data = ProjectCreate(title=title, description=description)
+            project = await create_project(
+                db=db,
+                owner_id=current_user["user_id"],
+                project_data=project_data,
+                filename=pdf_file.filename
+            )
+            document = await create_document(db, project.id, pdf_file.filename, content_hash)
 
-        await pdf_file.close()
-        # Process the text
-        summary = None
-        try:
-            # Generate summary
-            summary = await summarizer.summarize(pdf_text)
-            
-            if summary:
-                await create_system_chat(
-                    db=db,
+        # Queue upload, parsing, summary and embedding of the first document
+        with record_stage(ingestion_stage_seconds, "enqueue"):
+            try:
+                job = await enqueue_document_ingestion(
+                    db,
                     project_id=project.id,
-                    message=f"{summary}"
+                    document_id=document.id,
+                    owner_id=current_user["user_id"],
+                    pdf_content=pdf_content,
+                    filename=pdf_file.filename,
+                    is_primary=True,
+                    content_hash=content_hash
                 )
-            
-            # Chunk text and store in vector DB
-            chunks = text_chunker.chunk_text(pdf_text)
-            await vector_store.add_texts(
-                texts=chunks,
-                metadatas=[{"project_id": str(project.id)} for _ in chunks]
-            )
-        except Exception as e:
-            logging.error(f"Text processing error: {str(e)}")
-            # Consider whether to raise here if processing is critical
+            except Exception:
+                # Queue full since the capacity check, or the upload could not be spooled; don't keep an empty project
+                await delete_project(db, project.id, current_user["user_id"])
+                raise
 
         return {
             "id": project.id,
@@ -122,19 +117,44 @@ async def create_project_endpoint(
             "created_at": project.created_at.isoformat(),  # Consistent format
             "owner_id": project.user_id,
             "pdf_url": project.pdf_url,
-            "summary": summary
+            "document_id": document.id,
+            "job_id": job.id,
+            "status": job.status
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Project creation failed: {str(e)}")
+        failures_total.inc(stage="create_project")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to create project"
         )
 
+@router.get(
+    "/projects/{project_id}/ingestion",
+    status_code=status.HTTP_200_OK,
+    response_model=IngestionJobResponse
+)
+async def fetch_ingestion_status(
+    project_id: int,
+    user: dict = Depends(verify_project_owner),
+    db: AsyncSession = Depends(get_database_session),
+) -> IngestionJobResponse:
+    """
+    Report the status and progress of the latest ingestion job of a project.
+    """
+    job = await get_latest_project_job(db, project_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No ingestion job found for this project"
+        )
+    return IngestionJobResponse.model_validate(job)
+
 @router.delete("/project/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_project_endpoint(
     project_id: int,
-    current_user: dict = Depends(get_current_user),
     user: dict = Depends(verify_project_owner),
     db: AsyncSession = Depends(get_database_session),
 ):
@@ -144,7 +164,9 @@ async def delete_project_endpoint(
         vector_store.delete_project_collection()
         
         # Then delete from database
-        await delete_project(db, project_id, current_user["user_id"])
+        await delete_project(db, project_id, user["user_id"])
+        ownership_cache.invalidate_project(project_id)
+        answer_cache.invalidate_project(project_id)
         
         return Response(status_code=status.HTTP_204_NO_CONTENT)
     except HTTPException:
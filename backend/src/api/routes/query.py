@@ -1,98 +1,334 @@
 # routes/query.py
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Request, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import AsyncIterator, Dict, List, Literal, Optional, get_args
 from ..dependencies.session import get_database_session
 from ..dependencies.verify_owner import verify_project_owner
-from src.security.jwt import get_current_user
+from src.database.db import AsyncSessionLocal
 from src.database.crud.chats import create_system_chat
 from src.database.crud.chats import create_user_chat
-from src.database.crud.chats import get_project_chats
+from src.database.crud.chats import get_recent_project_chats
+from src.database.crud.chats import get_conversation_summary
+from src.database.models.conversation_summaries import ConversationSummary
 
 from src.services.vector_store import VectorStore
+from src.services.answer_cache import answer_cache, answered_turns
 from src.services.llm import LLMSummarizer
+from src.services.context_builder import ContextBuilder, QueryContext, CONTEXT_TOKEN_BUDGET
+from src.services.reranker import reranker
+from src.services.executors import run_blocking
+from src.services.metrics import failures_total, query_stage_seconds, record_stage
+from src.services.conversation_memory import update_conversation_summary, CHAT_HISTORY_WINDOW
+import asyncio
+import json
 import logging
+import os
+import time
 
 router = APIRouter()
 
+# Latest answered turns whose text is part of an answer's cache key, by
+# default the whole window the LLM sees, so a follow-up like "Why?" is only
+# served an answer given in the same conversation state. 0 drops the
+# conversation from the key, which shares answers across it.
+ANSWER_CACHE_HISTORY_TURNS = int(os.getenv("ANSWER_CACHE_HISTORY_TURNS", CHAT_HISTORY_WINDOW))
+
+SearchMode = Literal["dense", "hybrid"]
+
+# Pydantic does not validate defaults, so a typo would silently fall back to dense
+DEFAULT_SEARCH_MODE = os.getenv("DEFAULT_SEARCH_MODE", "dense")
+if DEFAULT_SEARCH_MODE not in get_args(SearchMode):
+    raise ValueError(f"Unknown DEFAULT_SEARCH_MODE: {DEFAULT_SEARCH_MODE}")
+
 # Request body schema
 class QueryRequest(BaseModel):
     query: str
     top_k: int = 4
+    max_context_tokens: Optional[int] = None  # Defaults to CONTEXT_TOKEN_BUDGET
+    search_mode: SearchMode = DEFAULT_SEARCH_MODE
+    rerank: bool = False  # Re-rank candidates with the cross-encoder
+    rerank_candidates: int = 20  # Candidates retrieved for re-ranking
 
 
-# Initialize services (singleton style)
+def get_llm() -> LLMSummarizer:
+    """LLM dependency, overridable with a fake provider in tests"""
+    return LLMSummarizer()
 
 
-@router.post("/query/{project_id}", status_code=status.HTTP_201_CREATED)
-async def query_endpoint(
+async def start_query(
+    db: AsyncSession,
     project_id: int,
     payload: QueryRequest,
-    current_user: dict = Depends(get_current_user),
-    user: dict = Depends(verify_project_owner),  # Added ownership verification
-    db: AsyncSession = Depends(get_database_session)
-):
-    try:
-        # Initialize project-specific vector store
-        vector_store = VectorStore(project_id) 
-        llm = LLMSummarizer()
-
-        # 1. Get chat history
-        chat_history = await get_project_chats(db, project_id)
-        
-        # 2. Store user's query
+    llm: LLMSummarizer,
+    background_tasks: BackgroundTasks,
+    timings: Dict[str, float]
+) -> tuple[list, Optional[ConversationSummary], str]:
+    """
+    Load the conversation state and store the user's query.
+
+    Returns:
+        (chat_history, conversation_summary, answer_key), where answer_key
+        identifies the answer in the answer cache
+    """
+    # 1. Get the latest turns and the rolling summary of older ones
+    with record_stage(query_stage_seconds, "history_fetch", timings):
+        chat_history = await get_recent_project_chats(db, project_id, CHAT_HISTORY_WINDOW)
+        conversation_summary = await get_conversation_summary(db, project_id)
+
+    # 2. Store user's query
+    with record_stage(query_stage_seconds, "chat_write", timings):
         await create_user_chat(db, project_id, payload.query)
-        
-        # 3. Perform similarity search
-        similar_docs = vector_store.similarity_search(
-            query=payload.query,
-            k=payload.top_k or 4  # Default to 4 if not specified
-        )
 
-        if not similar_docs:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No relevant documents found"
+    # 3. Fold turns leaving the window into the summary after the response is sent
+    if len(chat_history) >= CHAT_HISTORY_WINDOW:
+        background_tasks.add_task(update_conversation_summary, project_id, chat_history[0].chat_id, llm)
+
+    answer_key = answer_cache.make_key(
+        payload.query,
+        payload.model_dump(exclude={"query"}),
+        answered_turns(payload.query, chat_history, ANSWER_CACHE_HISTORY_TURNS),
+        conversation_summary.summary if conversation_summary and ANSWER_CACHE_HISTORY_TURNS > 0 else None
+    )
+    return chat_history, conversation_summary, answer_key
+
+
+async def retrieve_context(
+    project_id: int,
+    payload: QueryRequest,
+    chat_history: list,
+    conversation_summary: Optional[ConversationSummary],
+    timings: Dict[str, float]
+) -> tuple[list, QueryContext]:
+    """
+    Gather the documents and prompt context the LLM needs to answer a query.
+    Does not touch the database, so it can be shared by coalesced requests.
+    Stage latencies are recorded in `timings` and in the query stage histogram.
+
+    Returns:
+        (similar_docs, context)
+    """
+    # Initialize project-specific vector store
+    vector_store = VectorStore(project_id)
+
+    # 4. Perform similarity search (dense only, or fused with BM25)
+    top_k = payload.top_k or 4  # Default to 4 if not specified
+    # With re-ranking, retrieve a larger candidate set and keep the best top_k
+    retrieve_k = max(payload.rerank_candidates, top_k) if payload.rerank else top_k
+    with record_stage(query_stage_seconds, "retrieval", timings):
+        if payload.search_mode == "hybrid":
+            similar_docs = await vector_store.hybrid_search(query=payload.query, k=retrieve_k)
+        else:
+            similar_docs = await vector_store.dense_search(payload.query, retrieve_k)
+
+    if payload.rerank and similar_docs:
+        with record_stage(query_stage_seconds, "rerank", timings):
+            similar_docs = await run_blocking(
+                "embedding",
+                reranker.rerank, payload.query, similar_docs, top_k, str(project_id)
             )
 
-        # 4. Prepare context
-        concatenated_text = "\n\n".join(
-            [doc["document"] for doc in similar_docs[:5]]  # Limit to top 5 docs
+    if not similar_docs:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No relevant documents found"
         )
 
-        # 5. Format chat history (last 5 messages)
-        formatted_history = "\n".join(
-            [f"{'USER' if chat.sender_type else 'SYSTEM'}: {chat.message}" 
-             for chat in chat_history[-8:]]  # Last 5 messages
+    # 5. Pack the best chunks and recent turns into the token budget
+    with record_stage(query_stage_seconds, "prompt_build", timings):
+        context = ContextBuilder(
+            token_budget=payload.max_context_tokens or CONTEXT_TOKEN_BUDGET
+        ).build(
+            payload.query,
+            similar_docs,
+            chat_history,
+            conversation_summary=conversation_summary.summary if conversation_summary else None
         )
-        
-        full_context = f"Conversation history:\n{formatted_history}\n\nRelevant documents:\n{concatenated_text}"
 
-        # 6. Get LLM response
-        llm_response = await llm.answer_with_context(
-            query=payload.query,
-            context_docs=full_context
+    return similar_docs, context
+
+
+def answer_body(similar_docs: list, llm_response: str, context: QueryContext, timings: Dict[str, float]) -> dict:
+    """The cacheable part of a query response"""
+    return {
+        "matches": similar_docs,
+        "llm_response": llm_response,
+        "context_used": {
+            "documents": context.documents_used,
+            "history_items": context.history_used
+        },
+        "token_counts": context.token_counts,
+        "timings_ms": timings
+    }
+
+
+@router.post("/query/{project_id}", status_code=status.HTTP_201_CREATED)
+async def query_endpoint(
+    project_id: int,
+    payload: QueryRequest,
+    background_tasks: BackgroundTasks,
+    user: dict = Depends(verify_project_owner),  # Decodes the token and checks ownership
+    db: AsyncSession = Depends(get_database_session),
+    llm: LLMSummarizer = Depends(get_llm)
+):
+    """
+    Answer a query about a project's documents.
+
+    Identical concurrent queries (same normalized text, options and
+    conversation state) share one retrieval and LLM call, and completed answers
+    are served from the answer cache until the project's documents change.
+    Every request still stores its own query and answer in the chat log.
+    """
+    timings: Dict[str, float] = {}
+    try:
+        chat_history, conversation_summary, answer_key = await start_query(
+            db, project_id, payload, llm, background_tasks, timings
         )
 
+        async def compute_answer() -> dict:
+            answer_timings: Dict[str, float] = {}
+            similar_docs, context = await retrieve_context(
+                project_id, payload, chat_history, conversation_summary, answer_timings
+            )
+            # 6. Get LLM response
+            with record_stage(query_stage_seconds, "llm", answer_timings):
+                llm_response = await llm.answer_with_context(
+                    query=payload.query,
+                    context_docs=context.text
+                )
+            return answer_body(similar_docs, llm_response, context, answer_timings)
+
+        answer, answer_source = await answer_cache.get_or_compute(project_id, answer_key, compute_answer)
+        if answer_source == "computed":
+            timings.update(answer["timings_ms"])
+
         # 7. Store and return response
-        await create_system_chat(db, project_id, llm_response)
+        with record_stage(query_stage_seconds, "chat_write"):
+            await create_system_chat(db, project_id, answer["llm_response"])
 
         return {
             "query": payload.query,
-            "matches": similar_docs,
-            "llm_response": llm_response,
-            "context_used": {
-                "documents": len(similar_docs),
-                "history_items": len(chat_history)
-            }
+            **answer,
+            "timings_ms": timings,
+            "answer_source": answer_source
         }
 
     except HTTPException:
         raise
     except Exception as e:
         logging.error(f"Query failed: {str(e)}")
+        failures_total.inc(stage="query")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to process query"
+        )
+
+
+@router.post("/query/{project_id}/stream", status_code=status.HTTP_200_OK)
+async def stream_query_endpoint(
+    project_id: int,
+    payload: QueryRequest,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    user: dict = Depends(verify_project_owner),
+    db: AsyncSession = Depends(get_database_session),
+    llm: LLMSummarizer = Depends(get_llm)
+):
+    """
+    Stream the answer to a query as it is generated.
+
+    Events are sent as NDJSON, or as Server-Sent Events when the client accepts
+    text/event-stream: first a "matches" event with the retrieved documents, then
+    one "token" event per model chunk, and finally a "done" event with the full
+    answer, which is saved to the chat log. If the client disconnects, generation
+    is cancelled and nothing is saved.
+
+    A cached answer is sent as a single "token" event. Streamed answers are not
+    coalesced, but a completed one is stored in the answer cache.
+    """
+    timings: Dict[str, float] = {}
+    try:
+        chat_history, conversation_summary, answer_key = await start_query(
+            db, project_id, payload, llm, background_tasks, timings
+        )
+        cached = answer_cache.get(project_id, answer_key)
+        if cached is None:
+            documents_version = answer_cache.version(project_id)
+            similar_docs, context = await retrieve_context(
+                project_id, payload, chat_history, conversation_summary, timings
+            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Query failed: {str(e)}")
+        failures_total.inc(stage="query")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to process query"
-        )
\ No newline at end of file
+        )
+
+    use_sse = "text/event-stream" in request.headers.get("accept", "")
+
+    def encode(event: dict) -> str:
+        data = json.dumps(event)
+        return f"data: {data}\n\n" if use_sse else f"{data}\n"
+
+    async def save_answer(llm_response: str) -> None:
+        # The request's session is closed once streaming starts, so use a new one
+        with record_stage(query_stage_seconds, "chat_write"):
+            async with AsyncSessionLocal() as session:
+                await create_system_chat(session, project_id, llm_response)
+
+    async def cached_stream() -> AsyncIterator[str]:
+        yield encode({"type": "matches", "query": payload.query, "matches": cached["matches"]})
+        yield encode({"type": "token", "text": cached["llm_response"]})
+        await save_answer(cached["llm_response"])
+        yield encode({
+            "type": "done",
+            **{key: value for key, value in cached.items() if key != "matches"},
+            "timings_ms": timings,
+            "answer_source": "hit"
+        })
+
+    async def event_stream() -> AsyncIterator[str]:
+        yield encode({"type": "matches", "query": payload.query, "matches": similar_docs})
+
+        answer_parts: List[str] = []
+        started = time.perf_counter()
+        tokens = llm.stream_answer_with_context(query=payload.query, context_docs=context.text)
+        try:
+            async for text in tokens:
+                if await request.is_disconnected():
+                    logging.info(f"Client disconnected, cancelling answer for project {project_id}")
+                    return
+                answer_parts.append(text)
+                yield encode({"type": "token", "text": text})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Streaming query failed: {str(e)}")
+            failures_total.inc(stage="llm")
+            yield encode({"type": "error", "detail": "Failed to process query"})
+            return
+        finally:
+            await tokens.aclose()
+
+        elapsed = time.perf_counter() - started
+        query_stage_seconds.observe(elapsed, stage="llm")
+        timings["llm_ms"] = round(elapsed * 1000, 2)
+        llm_response = "".join(answer_parts).strip()
+        await save_answer(llm_response)
+
+        answer = answer_body(similar_docs, llm_response, context, dict(timings))
+        answer_cache.put(project_id, answer_key, answer, documents_version)
+        yield encode({
+            "type": "done",
+            **{key: value for key, value in answer.items() if key != "matches"},
+            "answer_source": "computed"
+        })
+
+    return StreamingResponse(
+        cached_stream() if cached is not None else event_stream(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson"
+    )
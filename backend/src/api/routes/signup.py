@@ -30,6 +30,9 @@ async def signup(
         new_user = await create_user(db, user_data)
         await db.commit()  # Explicit commit
         return new_user
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
         await db.rollback()  # Important for error cases
         raise HTTPException(
@@ -1,6 +1,8 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from ..models.chats import Chat
+from ..models.conversation_summaries import ConversationSummary
 from sqlalchemy import select
+from typing import Optional
 
 async def create_system_chat(
     db: AsyncSession,
@@ -62,4 +64,86 @@ async def get_project_chats(
         .order_by(Chat.created_at.asc())  # Oldest messages first
     )
     chats = result.scalars().all()
-    return chats
\ No newline at end of file
+    return chats
+
+async def get_recent_project_chats(
+    db: AsyncSession,
+    project_id: int,
+    limit: int
+) -> list[Chat]:
+    """
+    Retrieve only the latest `limit` chat messages of a project.
+
+    Uses ORDER BY created_at DESC LIMIT N on the (project_id, created_at) index,
+    so the cost does not grow with the length of the conversation.
+
+    Returns:
+        List of Chat objects ordered by creation time (oldest first)
+    """
+    result = await db.execute(
+        select(Chat)
+        .where(Chat.project_id == project_id)
+        .order_by(Chat.created_at.desc(), Chat.chat_id.desc())
+        .limit(limit)
+    )
+    chats = list(result.scalars().all())
+    chats.reverse()
+    return chats
+
+
+async def get_chats_between(
+    db: AsyncSession,
+    project_id: int,
+    after_chat_id: int,
+    before_chat_id: int,
+    limit: int
+) -> list[Chat]:
+    """
+    Retrieve up to `limit` chat messages with after_chat_id < chat_id < before_chat_id,
+    oldest first.
+    """
+    result = await db.execute(
+        select(Chat)
+        .where(
+            Chat.project_id == project_id,
+            Chat.chat_id > after_chat_id,
+            Chat.chat_id < before_chat_id
+        )
+        .order_by(Chat.chat_id.asc())
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def get_conversation_summary(
+    db: AsyncSession,
+    project_id: int
+) -> Optional[ConversationSummary]:
+    """
+    Retrieve the rolling summary of a project's older chat turns, if any.
+    """
+    result = await db.execute(
+        select(ConversationSummary)
+        .where(ConversationSummary.project_id == project_id)
+    )
+    return result.scalars().first()
+
+
+async def save_conversation_summary(
+    db: AsyncSession,
+    project_id: int,
+    summary: str,
+    last_chat_id: int
+) -> ConversationSummary:
+    """
+    Create or update the rolling summary of a project.
+    """
+    conversation_summary = await get_conversation_summary(db, project_id)
+    if conversation_summary is None:
+        conversation_summary = ConversationSummary(project_id=project_id)
+        db.add(conversation_summary)
+    conversation_summary.summary = summary
+    conversation_summary.last_chat_id = last_chat_id
+    await db.commit()
+    await db.refresh(conversation_summary)
+    return conversation_summary
@@ -0,0 +1,271 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, exists, func
+from ..models.documents import Document, DocumentChunk
+from ..models.ingestion_jobs import IngestionJob
+from ..models.projects import Project
+from typing import Optional
+
+
+def chunk_vector_id(document_id: int, chunk_index: int) -> str:
+    """Stable vector-store id of a chunk, unique within its project"""
+    return f"{document_id}:{chunk_index}"
+
+
+async def create_document(
+    db: AsyncSession,
+    project_id: int,
+    filename: str,
+    content_hash: Optional[str] = None
+) -> Document:
+    """
+    Register a new document of a project; the PDF is uploaded by the ingestion job.
+    """
+    document = Document(project_id=project_id, original_name=filename, content_hash=content_hash)
+    db.add(document)
+    await db.commit()
+    await db.refresh(document)
+    return document
+
+
+async def get_document(
+    db: AsyncSession,
+    document_id: int
+) -> Optional[Document]:
+    result = await db.execute(
+        select(Document)
+        .where(Document.id == document_id)
+    )
+    return result.scalars().first()
+
+
+async def find_indexed_document(
+    db: AsyncSession,
+    content_hash: str,
+    owner_id: int,
+    exclude_document_id: Optional[int] = None
+) -> Optional[Document]:
+    """
+    Find the most recent fully indexed document with the same content hash
+    in one of the owner's projects. Uploads of other users are never reused,
+    as that would hand out their S3 key and reveal that they uploaded the file.
+
+    Args:
+        db: Database session
+        content_hash: SHA-256 of the uploaded PDF
+        owner_id: User uploading the PDF
+        exclude_document_id: Document being ingested, never its own source
+
+    Returns:
+        The document to copy the S3 object, chunks and summary from, or None
+    """
+    query = (
+        select(Document)
+        .join(Project, Project.id == Document.project_id)
+        .where(
+            Project.user_id == owner_id,
+            Document.content_hash == content_hash,
+            Document.s3_key.is_not(None),
+            Document.chunk_count.is_not(None)
+        )
+        .order_by(Document.id.desc())
+        .limit(1)
+    )
+    if exclude_document_id is not None:
+        query = query.where(Document.id != exclude_document_id)
+    result = await db.execute(query)
+    return result.scalars().first()
+
+
+async def find_project_document(
+    db: AsyncSession,
+    project_id: int,
+    content_hash: str,
+    exclude_document_id: Optional[int] = None
+) -> Optional[Document]:
+    """
+    Find the oldest document of a project with the same content hash that is
+    indexed or still being ingested. Documents whose ingestion failed do not
+    count, so a failed upload can be retried.
+    """
+    query = (
+        select(Document)
+        .where(
+            Document.project_id == project_id,
+            Document.content_hash == content_hash,
+            ~exists().where(
+                IngestionJob.document_id == Document.id,
+                IngestionJob.status == "FAILED"
+            )
+        )
+        .order_by(Document.id.asc())
+        .limit(1)
+    )
+    if exclude_document_id is not None:
+        query = query.where(Document.id != exclude_document_id)
+    result = await db.execute(query)
+    return result.scalars().first()
+
+
+async def count_s3_key_references(
+    db: AsyncSession,
+    s3_key: str,
+    exclude_project_id: Optional[int] = None,
+    exclude_document_id: Optional[int] = None
+) -> int:
+    """
+    Count documents still pointing at an S3 object, so shared uploads are only
+    deleted with their last reference.
+    """
+    query = select(func.count(Document.id)).where(Document.s3_key == s3_key)
+    if exclude_project_id is not None:
+        query = query.where(Document.project_id != exclude_project_id)
+    if exclude_document_id is not None:
+        query = query.where(Document.id != exclude_document_id)
+    result = await db.execute(query)
+    return result.scalar_one()
+
+
+async def get_project_documents(
+    db: AsyncSession,
+    project_id: int
+) -> list[Document]:
+    """
+    Retrieve all documents of a project, oldest first.
+    """
+    result = await db.execute(
+        select(Document)
+        .where(Document.project_id == project_id)
+        .order_by(Document.created_at.asc(), Document.id.asc())
+    )
+    return list(result.scalars().all())
+
+
+async def set_document_pdf(
+    db: AsyncSession,
+    document_id: int,
+    s3_key: str,
+    url: str
+) -> None:
+    """Attach the uploaded PDF location to a document"""
+    await db.execute(
+        update(Document)
+        .where(Document.id == document_id)
+        .values(s3_key=s3_key, url=url)
+    )
+    await db.commit()
+
+
+async def set_document_stats(
+    db: AsyncSession,
+    document_id: int,
+    page_count: int,
+    chunk_count: int
+) -> None:
+    await db.execute(
+        update(Document)
+        .where(Document.id == document_id)
+        .values(page_count=page_count, chunk_count=chunk_count)
+    )
+    await db.commit()
+
+
+async def set_document_summary(
+    db: AsyncSession,
+    document_id: int,
+    summary: str
+) -> None:
+    await db.execute(
+        update(Document)
+        .where(Document.id == document_id)
+        .values(summary=summary)
+    )
+    await db.commit()
+
+
+async def add_document_chunks(
+    db: AsyncSession,
+    document_id: int,
+    project_id: int,
+    start_index: int,
+    chunks: list[str]
+) -> None:
+    """
+    Record metadata rows for a batch of chunks starting at `start_index`.
+    """
+    db.add_all([
+        DocumentChunk(
+            document_id=document_id,
+            project_id=project_id,
+            chunk_index=start_index + i,
+            vector_id=chunk_vector_id(document_id, start_index + i),
+            char_count=len(chunk)
+        )
+        for i, chunk in enumerate(chunks)
+    ])
+    await db.commit()
+
+
+async def delete_document_chunks(
+    db: AsyncSession,
+    document_id: int
+) -> None:
+    """
+    Delete the chunk rows of a document whose ingestion failed and mark it as
+    not indexed, so it is never reused as a copy source. Its vectors are
+    removed by the caller.
+    """
+    await db.execute(
+        delete(DocumentChunk)
+        .where(DocumentChunk.document_id == document_id)
+    )
+    await db.execute(
+        update(Document)
+        .where(Document.id == document_id)
+        .values(page_count=None, chunk_count=None)
+    )
+    await db.commit()
+
+
+async def get_failed_documents_with_chunks(db: AsyncSession) -> list[tuple[int, int]]:
+    """
+    (project_id, document_id) of documents whose ingestion failed but whose
+    chunks could not be discarded yet.
+    """
+    result = await db.execute(
+        select(DocumentChunk.project_id, DocumentChunk.document_id)
+        .join(IngestionJob, IngestionJob.document_id == DocumentChunk.document_id)
+        .where(IngestionJob.status == "FAILED")
+        .distinct()
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def delete_document_rows(
+    db: AsyncSession,
+    document_id: int
+) -> None:
+    """
+    Delete a document with its chunk and ingestion job rows, and clear the
+    project's PDF if it pointed at this document. Vectors and the S3 object
+    are removed by the caller.
+    """
+    document = await get_document(db, document_id)
+    if document and document.s3_key:
+        await db.execute(
+            update(Project)
+            .where(Project.id == document.project_id, Project.pdf_s3_key == document.s3_key)
+            .values(pdf_s3_key=None, pdf_url=None)
+        )
+    await db.execute(
+        delete(IngestionJob)
+        .where(IngestionJob.document_id == document_id)
+    )
+    await db.execute(
+        delete(DocumentChunk)
+        .where(DocumentChunk.document_id == document_id)
+    )
+    await db.execute(
+        delete(Document)
+        .where(Document.id == document_id)
+    )
+    await db.commit()
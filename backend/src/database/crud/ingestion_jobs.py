@@ -0,0 +1,74 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+from ..models.ingestion_jobs import IngestionJob
+from typing import Optional
+import uuid
+
+
+async def create_ingestion_job(
+    db: AsyncSession,
+    project_id: int,
+    document_id: Optional[int] = None
+) -> IngestionJob:
+    """
+    Create a QUEUED ingestion job for a project document.
+    """
+    job = IngestionJob(
+        id=str(uuid.uuid4()),
+        project_id=project_id,
+        document_id=document_id,
+        status="QUEUED",
+        progress=0
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+async def update_ingestion_job(
+    db: AsyncSession,
+    job_id: str,
+    status: Optional[str] = None,
+    progress: Optional[int] = None,
+    error: Optional[str] = None
+) -> None:
+    """
+    Persist the status, progress and/or error of an ingestion job.
+    Only the fields that are passed are updated.
+    """
+    values = {}
+    if status is not None:
+        values["status"] = status
+    if progress is not None:
+        values["progress"] = progress
+    if error is not None:
+        values["error"] = error
+    if not values:
+        return
+
+    await db.execute(
+        update(IngestionJob)
+        .where(IngestionJob.id == job_id)
+        .values(**values)
+    )
+    await db.commit()
+
+
+async def get_latest_project_job(
+    db: AsyncSession,
+    project_id: int
+) -> Optional[IngestionJob]:
+    """
+    Retrieve the most recent ingestion job for a project.
+
+    Returns:
+        The newest IngestionJob, or None if the project has never been ingested
+    """
+    result = await db.execute(
+        select(IngestionJob)
+        .where(IngestionJob.project_id == project_id)
+        .order_by(IngestionJob.created_at.desc())
+        .limit(1)
+    )
+    return result.scalars().first()
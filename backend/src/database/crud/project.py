@@ -1,14 +1,19 @@
-from fastapi import HTTPException, UploadFile
+from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from ..models.projects import Project
 from ..schemas import ProjectCreate  # Make sure this schema matches what you need
-import boto3
-from botocore.exceptions import ClientError
-import os
 from datetime import datetime
+import uuid
 from sqlalchemy import select
 from sqlalchemy import delete
+from sqlalchemy import update
 from src.database.models.chats import Chat  # Import your Chat model
+from src.database.models.ingestion_jobs import IngestionJob
+from src.database.models.conversation_summaries import ConversationSummary
+from src.database.models.documents import Document, DocumentChunk
+from src.database.crud.documents import count_s3_key_references
+from src.services.metrics import failures_total, ingestion_stage_seconds
+from src.services.storage import StorageError, get_storage
 from src.services.vector_store import VectorStore
 
 
@@ -30,90 +35,87 @@ async def get_project(db: AsyncSession, project_id: int):
 
     return result.scalars().first()
 
+async def get_project_owner_id(db: AsyncSession, project_id: int):
+    """Return the owner's user id of a project, or None if it does not exist"""
+    result = await db.execute(
+        select(Project.user_id)
+        .where(Project.id == project_id)
+    )
+    return result.scalar_one_or_none()
+
 async def create_project(
     db: AsyncSession,
     owner_id: int,
     project_data: ProjectCreate,
-    pdf_file: UploadFile,  # Raw PDF bytes (from FastAPI's UploadFile)
     filename: str     # Original filename
 ):
+    """Store the project metadata; the PDF is uploaded later by the ingestion job"""
     try:
-        # --- Upload PDF to S3 ---
-        s3 = boto3.client(
-            "s3",
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION")
-        )
-
-        # Generate unique S3 key
-        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-        s3_key = f"user_{owner_id}/project_{timestamp}_{filename}"
-
-        s3.upload_fileobj(
-            pdf_file.file,
-            os.getenv("AWS_S3_BUCKET"),
-            s3_key
-        )
-        s3_url = f"https://{os.getenv('AWS_S3_BUCKET')}.s3.amazonaws.com/{s3_key}"
-
-        # --- Store Project Metadata in DB ---
         async with db.begin():
             project = Project(
                 user_id=owner_id,  # Changed from owner_id to user_id to match model
                 title=project_data.title,
                 description=project_data.description,  # Make sure ProjectCreate has this field
-                pdf_url=s3_url,  # Store the public URL
-                pdf_s3_key=s3_key,
                 pdf_original_name=filename
             )
             db.add(project)
             await db.flush()
             await db.refresh(project)
-        
+
         return project
 
-    except ClientError as e:
+    except Exception as e:
         await db.rollback()
         raise HTTPException(
             status_code=500,
-            detail=f"S3 upload failed: {str(e)}"
+            detail=f"Database error: {str(e)}"
         )
-    except Exception as e:
-        await db.rollback()
+
+async def upload_project_pdf(
+    owner_id: int,
+    pdf_content: bytes,  # Raw PDF bytes
+    filename: str     # Original filename
+) -> tuple[str, str]:
+    """Upload a project PDF to storage and return its (s3_key, s3_url)"""
+    try:
+        # Generate unique S3 key
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        s3_key = f"user_{owner_id}/project_{timestamp}_{uuid.uuid4().hex[:8]}_{filename}"
+
+        with ingestion_stage_seconds.time(stage="storage_upload"):
+            s3_url = await get_storage().upload(s3_key, pdf_content)
+        return s3_key, s3_url
+
+    except StorageError as e:
+        failures_total.inc(stage="storage")
         raise HTTPException(
             status_code=500,
-            detail=f"Database error: {str(e)}"
+            detail=str(e)
         )
+
+async def set_project_pdf(
+    db: AsyncSession,
+    project_id: int,
+    s3_key: str,
+    s3_url: str
+) -> None:
+    """Attach the uploaded PDF location to a project"""
+    await db.execute(
+        update(Project)
+        .where(Project.id == project_id)
+        .values(pdf_s3_key=s3_key, pdf_url=s3_url)
+    )
+    await db.commit()
     
 async def delete_file(s3_key: str):
-    """Delete a file from S3"""
+    """Delete a file from storage; a missing file counts as deleted"""
     try:
-        s3 = boto3.client(
-            "s3",
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION")
-        )
-        
-        s3.delete_object(
-            Bucket=os.getenv("AWS_S3_BUCKET"),
-            Key=s3_key
-        )
+        await get_storage().delete(s3_key)
         return True
-    except ClientError as e:
-        error_code = e.response.get('Error', {}).get('Code', 'Unknown')
-        if error_code == 'NoSuchKey':
-            # File doesn't exist, which we can consider as successfully deleted
-            return True
-        raise HTTPException(
-            status_code=500,
-            detail=f"S3 deletion failed: {str(e)}"
-        )
-    except Exception as e:
+    except StorageError as e:
         raise HTTPException(
             status_code=500,
-            detail=f"S3 operation failed: {str(e)}"
+            detail=str(e)
         )
 
 async def delete_project(
@@ -121,7 +123,7 @@ async def delete_project(
     project_id: int,
     user_id: int
 ):
-    """Delete a project including its S3 file, chats, and database record"""
+    """Delete a project including its S3 files, chats, documents and database record"""
     try:
         # Get the project
         project = await get_project(db, project_id)
@@ -131,10 +133,19 @@ async def delete_project(
         if project.user_id != user_id:
             raise HTTPException(status_code=403, detail="Not authorized")
 
-        # Delete from S3 if it exists
+        # Delete every uploaded PDF from S3, keeping objects shared with other projects
+        result = await db.execute(
+            select(Document.s3_key)
+            .where(Document.project_id == project_id, Document.s3_key.is_not(None))
+        )
+        s3_keys = set(result.scalars().all())
         if project.pdf_s3_key:
+            s3_keys.add(project.pdf_s3_key)
+        for s3_key in s3_keys:
+            if await count_s3_key_references(db, s3_key, exclude_project_id=project_id):
+                continue
             try:
-                await delete_file(project.pdf_s3_key)
+                await delete_file(s3_key)
             except Exception as s3_error:
                 raise HTTPException(
                     status_code=500,
@@ -147,6 +158,23 @@ async def delete_project(
             .where(Chat.project_id == project_id)
         )
         
+        await db.execute(
+            delete(IngestionJob)
+            .where(IngestionJob.project_id == project_id)
+        )
+        await db.execute(
+            delete(ConversationSummary)
+            .where(ConversationSummary.project_id == project_id)
+        )
+        await db.execute(
+            delete(DocumentChunk)
+            .where(DocumentChunk.project_id == project_id)
+        )
+        await db.execute(
+            delete(Document)
+            .where(Document.project_id == project_id)
+        )
+
         # Then delete the project
         await db.execute(
             delete(Project)
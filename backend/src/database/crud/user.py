@@ -1,15 +1,13 @@
 from sqlalchemy.future import select
 from src.database.models.user import User
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from src.security.hashing.hasher import password_hasher
 
 async def get_user_by_username(db, username: str):
     result = await db.execute(select(User).where(User.username == username))
     return result.scalars().first()
 
 async def create_user(db, user_data):
-    hashed_password = pwd_context.hash(user_data.password)
+    hashed_password = await password_hasher.hash(user_data.password)
     db_user = User(username=user_data.username, hashed_password=hashed_password)
     db.add(db_user)
     await db.commit()
@@ -19,7 +17,13 @@ async def create_user(db, user_data):
 async def authenticate_user(db, username: str, password: str):
     user = await get_user_by_username(db, username)
     if not user:
+        # Same cost as a real check, so unknown usernames are not revealed by timing
+        return await password_hasher.dummy_verify(password)
+    verified, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+    if not verified:
         return False
-    if not pwd_context.verify(password, user.hashed_password):
-        return False
-    return user
\ No newline at end of file
+    if new_hash:
+        # Cost parameters changed since this hash was made; upgrade it transparently
+        user.hashed_password = new_hash
+        await db.commit()
+    return user
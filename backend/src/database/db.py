@@ -1,15 +1,63 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 from .base import Base  # Import from the new location
+from .instrumentation import TimedQueuePool, instrument_engine
 import os
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_async_engine(DATABASE_URL, echo=True)
+# Optional read replica for read-only listings; defaults to the primary
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+
+# Engine settings
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# asyncpg prepared statement cache; set to 0 behind pgbouncer in transaction mode
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 100))
+# Statements slower than this are logged
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", 200))
+
+
+def build_engine(url: str) -> AsyncEngine:
+    """Create an instrumented async engine with the configured pool settings"""
+    database_url = make_url(url)
+    options = {"echo": DB_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+    # In-memory SQLite keeps its single static connection
+    in_memory = database_url.get_backend_name() == "sqlite" and database_url.database in (None, "", ":memory:")
+    if not in_memory:
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE
+        )
+    if database_url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {"statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+
+    new_engine = create_async_engine(database_url, **options)
+    instrument_engine(new_engine.sync_engine, DB_SLOW_QUERY_MS)
+    return new_engine
+
+
+engine = build_engine(DATABASE_URL)
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+read_engine = build_engine(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else engine
+AsyncReadSessionLocal = sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+
 async def get_db():
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+async def get_read_db():
+    """Session on the read replica, for listings that tolerate replication lag"""
+    async with AsyncReadSessionLocal() as session:
+        yield session
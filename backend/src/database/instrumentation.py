@@ -0,0 +1,81 @@
+from typing import Dict
+import logging
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class DatabaseStats:
+    """Running totals of query times and pool checkout waits for this worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.slow_queries = 0
+        self.query_seconds = 0.0
+        self.checkouts = 0
+        self.checkout_wait_seconds = 0.0
+        self.max_checkout_wait_seconds = 0.0
+
+    def record_query(self, seconds: float, slow: bool) -> None:
+        with self._lock:
+            self.queries += 1
+            self.slow_queries += slow
+            self.query_seconds += seconds
+
+    def record_checkout(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_wait_seconds += seconds
+            self.max_checkout_wait_seconds = max(self.max_checkout_wait_seconds, seconds)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "queries": self.queries,
+                "slow_queries": self.slow_queries,
+                "avg_query_ms": round(self.query_seconds / (self.queries or 1) * 1000, 3),
+                "checkouts": self.checkouts,
+                "avg_checkout_wait_ms": round(self.checkout_wait_seconds / (self.checkouts or 1) * 1000, 3),
+                "max_checkout_wait_ms": round(self.max_checkout_wait_seconds * 1000, 3),
+            }
+
+
+database_stats = DatabaseStats()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Connection pool that records how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            database_stats.record_checkout(time.perf_counter() - started)
+
+
+def instrument_engine(engine: Engine, slow_query_ms: float) -> None:
+    """Time every statement and log those slower than `slow_query_ms`"""
+
+    # Statements on a connection run one at a time, so one start time per connection is enough
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop("query_started")
+        slow = elapsed * 1000 >= slow_query_ms
+        database_stats.record_query(elapsed, slow)
+        if slow:
+            logging.warning(f"Slow query ({elapsed * 1000:.1f} ms): {' '.join(statement.split())[:500]}")
+
+    @event.listens_for(engine, "handle_error")
+    def _discard_timer(exception_context):
+        # A failed statement never reaches _stop_timer; drop its start time
+        # so nothing stays behind on the pooled connection
+        if exception_context.connection is not None:
+            exception_context.connection.info.pop("query_started", None)
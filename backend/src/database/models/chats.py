@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.sql import func
 from ..base import Base  # Assuming you have a Base class similar to your Project model
 
@@ -11,6 +11,11 @@ class Chat(Base):
     message = Column(Text)  # The actual chat message content
     created_at = Column(DateTime(timezone=True), server_default=func.now())  # Auto-set on creation
 
+    # Serves "latest N turns of a project" without scanning the project's whole history
+    __table_args__ = (
+        Index("ix_chats_project_id_created_at", "project_id", "created_at"),
+    )
+
     # Optional: Add __repr__ for better debugging
     def __repr__(self):
         return f"<Chat(chat_id={self.chat_id}, project_id={self.project_id}, sender_type='{self.sender_type}')>"
\ No newline at end of file
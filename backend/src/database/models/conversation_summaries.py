@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from ..base import Base
+
+class ConversationSummary(Base):
+    __tablename__ = "conversation_summaries"
+
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)  # One rolling summary per project
+    summary = Column(Text, nullable=False)  # Summary of every turn up to last_chat_id
+    last_chat_id = Column(Integer, nullable=False)  # Newest chat already folded into the summary
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<ConversationSummary(project_id={self.project_id}, last_chat_id={self.last_chat_id})>"
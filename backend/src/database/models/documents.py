@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy.sql import func
+from ..base import Base
+
+class Document(Base):
+    __tablename__ = "documents"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), index=True)  # Project the PDF belongs to
+    original_name = Column(String(255))  # Original filename
+    s3_key = Column(String(255), nullable=True)  # S3 storage key, set once uploaded
+    url = Column(String(255), nullable=True)  # URL to access the PDF
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 of the uploaded bytes
+    summary = Column(Text, nullable=True)  # LLM summary, reused by identical uploads
+    page_count = Column(Integer, nullable=True)
+    chunk_count = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<Document(id={self.id}, project_id={self.project_id}, original_name='{self.original_name}')>"
+
+
+class DocumentChunk(Base):
+    __tablename__ = "document_chunks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id"), index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), index=True)
+    chunk_index = Column(Integer, nullable=False)  # Position of the chunk within its document
+    vector_id = Column(String(64), nullable=False)  # Stable id in the vector store: "<document_id>:<chunk_index>"
+    char_count = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<DocumentChunk(vector_id='{self.vector_id}', project_id={self.project_id})>"
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy.sql import func
+from ..base import Base
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(String(36), primary_key=True)  # UUID assigned when the job is queued
+    project_id = Column(Integer, ForeignKey("projects.id"), index=True)  # Project being ingested
+    document_id = Column(Integer, ForeignKey("documents.id"), index=True, nullable=True)  # Document being ingested
+    status = Column(
+        Enum('QUEUED', 'PARSING', 'EMBEDDING', 'DONE', 'FAILED', name='ingestion_statuses'),
+        nullable=False,
+        default='QUEUED'
+    )
+    progress = Column(Integer, nullable=False, default=0)  # Percentage complete (0-100)
+    error = Column(Text, nullable=True)  # Failure reason when FAILED, or why the summary is missing when DONE
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<IngestionJob(id={self.id}, project_id={self.project_id}, status='{self.status}')>"
@@ -59,4 +59,36 @@ class ChatResponse(BaseModel):
     created_at: datetime
 
     # Pydantic V2 config (replaces old Config class)
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class IngestionStatus(str, Enum):
+    QUEUED = "QUEUED"
+    PARSING = "PARSING"
+    EMBEDDING = "EMBEDDING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+class IngestionJobResponse(BaseModel):
+    id: str
+    project_id: int
+    document_id: Optional[int] = None
+    status: IngestionStatus
+    progress: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class DocumentResponse(BaseModel):
+    id: int
+    project_id: int
+    original_name: str
+    url: Optional[str] = None
+    content_hash: Optional[str] = None
+    page_count: Optional[int] = None
+    chunk_count: Optional[int] = None
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
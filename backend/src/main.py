@@ -1,9 +1,25 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 from src.api.endpoints import router as api_endpoint_router
+from src.services.executors import shutdown_executors
+from src.services.ingestion import discard_failed_ingestions
+from src.services.ingestion_queue import ingestion_queue
+from src.services.metrics import MetricsMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background ingestion workers live for the lifetime of the app
+    await ingestion_queue.start()
+    # Finish the cleanup of failed jobs that an earlier run could not complete
+    await ingestion_queue.enqueue("discard-failed-ingestions", discard_failed_ingestions)
+    yield
+    await ingestion_queue.stop()
+    shutdown_executors()
 
 def initialize_backend_application() -> FastAPI:
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
 
     app.add_middleware(
         CORSMiddleware,
@@ -19,6 +35,9 @@ def initialize_backend_application() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Counts in-flight requests and times each route for /metrics
+    app.add_middleware(MetricsMiddleware)
+
     app.include_router(router=api_endpoint_router)
 
     return app
@@ -0,0 +1,53 @@
+from passlib.context import CryptContext
+from typing import Optional, Tuple
+from os import getenv
+from src.services.executors import run_blocking
+
+
+class PasswordHasher:
+    """
+    bcrypt hashing for user passwords, run on the bounded "hashing" executor pool.
+
+    EXECUTOR_HASHING_WORKERS caps how many hashes are computed at once and
+    EXECUTOR_HASHING_QUEUE how many logins may wait; beyond that login returns
+    503 instead of queueing CPU work without limit. Hashes whose cost differs
+    from BCRYPT_ROUNDS are flagged for a rehash on the next successful login.
+    """
+
+    def __init__(self, rounds: int = int(getenv("BCRYPT_ROUNDS", 12))):
+        self.rounds = rounds
+        self._context: CryptContext = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds
+        )
+        self._dummy_hash: Optional[str] = None
+
+    async def hash(self, password: str) -> str:
+        return await run_blocking("hashing", self._context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password; if it matches but was hashed with other cost
+        parameters, also return a new hash to store.
+        """
+        return await run_blocking("hashing", self._context.verify_and_update, password, hashed_password)
+
+    async def dummy_verify(self, password: str) -> bool:
+        """
+        Spend the same time as a real verification, so unknown usernames cannot
+        be told apart from wrong passwords by response time.
+        """
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hash("dummy-password-for-timing")
+        await run_blocking("hashing", self._context.verify, password, self._dummy_hash)
+        return False
+
+
+def get_password_hasher() -> PasswordHasher:
+    return PasswordHasher()
+
+
+password_hasher: PasswordHasher = get_password_hasher()
@@ -73,10 +73,8 @@ class JWTGenerator:
                 "user_id": int(payload.get("user_id"))  # Ensure this is int
             }
         except JWTError as e:
-            print(f"JWT Error details: {str(e)}")  # More detailed error
             raise ValueError("Invalid token") from e
         except Exception as e:
-            print(f"Unexpected error: {str(e)}")
             raise ValueError(f"Token processing failed: {str(e)}") from e
 
 # Singleton instance
@@ -87,12 +85,8 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")  # Your login endpoint
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
     """Dependency to validate and get user from JWT token"""
     try:
-        print(f"Received token: {token}")  # Debug print
-        user_data = jwt_generator.retrieve_details_from_token(token)
-        print(f"Decoded user data: {user_data}")  # Debug print
-        return user_data
+        return jwt_generator.retrieve_details_from_token(token)
     except ValueError as e:
-        print(f"Token validation failed: {str(e)}")  # Debug print
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e),
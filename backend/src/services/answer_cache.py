@@ -0,0 +1,177 @@
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold, collapse whitespace and drop surrounding punctuation"""
+    return re.sub(r"\s+", " ", query.casefold()).strip(" \t\n?!.,;:")
+
+
+def answered_turns(query: str, history: Sequence, max_turns: int) -> List[Tuple[str, str]]:
+    """
+    The latest `max_turns` answered turns of `history`, as (sender_type, message)
+    pairs, that an answer to `query` depends on.
+
+    Questions still waiting for their answer at the end of the history are
+    left out, so identical questions asked together get the same key. Earlier
+    asks of `query` and their answers are left out as well, so asking the same
+    question again right after it was answered gets the same key too.
+    """
+    if max_turns <= 0:
+        return []
+    turns = [(str(getattr(chat.sender_type, "value", chat.sender_type)), chat.message or "") for chat in history]
+    while turns and turns[-1][0] == "USER":
+        turns.pop()
+    normalized = normalize_query(query)
+    kept = []
+    skip_answer = False
+    for sender_type, message in turns:
+        if sender_type == "USER" and normalize_query(message) == normalized:
+            skip_answer = True
+            continue
+        if not (skip_answer and sender_type == "SYSTEM"):
+            kept.append((sender_type, message))
+        skip_answer = False
+    return kept[-max_turns:]
+
+
+class AnswerCache:
+    """
+    Per-project cache of completed answers with single-flight coalescing.
+
+    Requests with the same key (normalized query, retrieval options and the
+    conversation state they answer) share one retrieval + LLM computation while
+    it is in flight, and its result is kept for `ttl_seconds` in an LRU of at
+    most `max_entries` answers.
+
+    Every project has a version that is bumped whenever its documents change.
+    Bumping drops the project's cached answers, and a computation that started
+    before the bump does not store its result, so a cached answer never
+    outlives the documents it was built from.
+    """
+
+    def __init__(self, ttl_seconds: float = 300.0, max_entries: int = 1024, enabled: bool = True):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: OrderedDict[Tuple[int, str], Tuple[float, dict]] = OrderedDict()
+        self._versions: Dict[int, int] = {}
+        self._in_flight: Dict[Tuple[int, int, str], asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(query: str, options: dict, history: Iterable[Tuple[str, str]], summary: Optional[str]) -> str:
+        """
+        Key for an answer to `query` given the retrieval options and the text of
+        the conversation it answers (see `answered_turns`) and its rolling summary
+        """
+        payload = json.dumps(
+            [normalize_query(query), options, [list(turn) for turn in history], summary],
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def version(self, project_id: int) -> int:
+        with self._lock:
+            return self._versions.get(project_id, 0)
+
+    def get(self, project_id: int, key: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get((project_id, key))
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end((project_id, key))
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[(project_id, key)]
+            self.misses += 1
+            return None
+
+    def put(self, project_id: int, key: str, answer: dict, version: int) -> None:
+        """Store an answer computed against documents at `version`, unless they changed since"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._versions.get(project_id, 0) != version:
+                return
+            self._entries[(project_id, key)] = (time.monotonic() + self.ttl_seconds, answer)
+            self._entries.move_to_end((project_id, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get_or_compute(
+        self,
+        project_id: int,
+        key: str,
+        compute: Callable[[], Awaitable[dict]]
+    ) -> Tuple[dict, str]:
+        """
+        Return the answer for `key` and where it came from: "hit" (cached),
+        "coalesced" (joined an identical computation in flight) or "computed".
+
+        The computation is shielded, so a caller that goes away does not
+        cancel it for the others waiting on it.
+        """
+        if not self.enabled:
+            return await compute(), "computed"
+
+        cached = self.get(project_id, key)
+        if cached is not None:
+            return cached, "hit"
+
+        version = self.version(project_id)
+        flight_key = (project_id, version, key)
+        task = self._in_flight.get(flight_key)
+        if task is not None:
+            with self._lock:
+                self.coalesced += 1
+            return await asyncio.shield(task), "coalesced"
+
+        task = asyncio.ensure_future(compute())
+        self._in_flight[flight_key] = task
+
+        def finish(done: asyncio.Task) -> None:
+            self._in_flight.pop(flight_key, None)
+            if not done.cancelled() and done.exception() is None:
+                self.put(project_id, key, done.result(), version)
+
+        task.add_done_callback(finish)
+        return await asyncio.shield(task), "computed"
+
+    def invalidate_project(self, project_id: int) -> None:
+        """Drop a project's answers after its documents changed"""
+        with self._lock:
+            self._versions[project_id] = self._versions.get(project_id, 0) + 1
+            for key in [key for key in self._entries if key[0] == project_id]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._in_flight),
+                "size": len(self._entries),
+            }
+
+
+answer_cache = AnswerCache(
+    ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL_SECONDS", 300)),
+    max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 1024)),
+    enabled=ANSWER_CACHE_ENABLED
+)
@@ -0,0 +1,155 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+import os
+from .prompt import get_qa_prompt
+from .tokens import TokenCounter, token_counter
+
+# Default prompt budget and the share of it that chat history may take
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 3000))
+CONTEXT_HISTORY_SHARE = float(os.getenv("CONTEXT_HISTORY_SHARE", 0.3))
+# Shortest suffix/prefix match treated as chunk overlap when merging neighbours
+MIN_MERGE_OVERLAP = 20
+
+
+def merge_overlapping(first: str, second: str) -> str:
+    """Join two neighbouring chunks, dropping the text they share"""
+    for size in range(min(len(first), len(second)), MIN_MERGE_OVERLAP - 1, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return f"{first}\n{second}"
+
+
+@dataclass
+class _Span:
+    """A run of adjacent chunks merged into one passage"""
+    start: Optional[int]
+    end: Optional[int]
+    text: str
+    chunks: int = 1
+    document_id: Optional[int] = None
+
+
+@dataclass
+class QueryContext:
+    text: str
+    documents_used: int
+    history_used: int
+    token_counts: Dict[str, int] = field(default_factory=dict)
+
+
+class ContextBuilder:
+    """
+    Packs retrieved chunks and recent chat turns into a token budget.
+
+    The rolling conversation summary and the recent turns (newest first) share up
+    to `history_share` of the budget left after the instructions and the query.
+    Ranked chunks then fill the rest, best first. Chunks whose `chunk_index`
+    metadata is adjacent to an already selected chunk of the same document are
+    merged into one passage, so the overlap TextChunker adds between neighbours is only sent once.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = CONTEXT_TOKEN_BUDGET,
+        history_share: float = CONTEXT_HISTORY_SHARE,
+        counter: TokenCounter = token_counter
+    ):
+        self.token_budget = token_budget
+        self.history_share = history_share
+        self.counter = counter
+
+    def build(
+        self,
+        query: str,
+        similar_docs: Sequence[Dict],
+        chat_history: Sequence,
+        conversation_summary: Optional[str] = None
+    ) -> QueryContext:
+        instructions = self.counter.count(get_qa_prompt("", ""))
+        query_tokens = self.counter.count(query)
+        available = max(self.token_budget - instructions - query_tokens, 0)
+        history_budget = int(available * self.history_share)
+
+        # The rolling summary of older turns comes out of the history share
+        summary_tokens = self.counter.count(conversation_summary) if conversation_summary else 0
+        if summary_tokens > history_budget:
+            conversation_summary, summary_tokens = None, 0
+
+        history_lines, history_tokens = self._pack_history(chat_history, history_budget - summary_tokens)
+        spans, document_tokens = self._pack_documents(
+            similar_docs, available - summary_tokens - history_tokens
+        )
+
+        formatted_history = "\n".join(history_lines)
+        concatenated_text = "\n\n".join(span.text for span in spans)
+        text = f"Conversation history:\n{formatted_history}\n\nRelevant documents:\n{concatenated_text}"
+        if conversation_summary:
+            text = f"Summary of earlier conversation:\n{conversation_summary}\n\n{text}"
+        return QueryContext(
+            text=text,
+            documents_used=sum(span.chunks for span in spans),
+            history_used=len(history_lines),
+            token_counts={
+                "budget": self.token_budget,
+                "instructions": instructions,
+                "query": query_tokens,
+                "conversation_summary": summary_tokens,
+                "history": history_tokens,
+                "documents": document_tokens,
+                "total": instructions + query_tokens + summary_tokens + history_tokens + document_tokens,
+            }
+        )
+
+    def _pack_history(self, chat_history: Sequence, budget: int) -> tuple[List[str], int]:
+        """Take the most recent turns that fit, returned oldest first"""
+        lines: List[str] = []
+        used = 0
+        for chat in reversed(chat_history):
+            line = f"{chat.sender_type}: {chat.message}"
+            cost = self.counter.count(line)
+            if used + cost > budget:
+                break
+            lines.append(line)
+            used += cost
+        lines.reverse()
+        return lines, used
+
+    def _pack_documents(self, similar_docs: Sequence[Dict], budget: int) -> tuple[List[_Span], int]:
+        """Add the best-ranked chunks that fit, merging adjacent ones"""
+        spans: List[_Span] = []
+        used = 0
+        for doc in similar_docs:
+            text = doc["document"]
+            metadata = doc.get("metadata") or {}
+            index = metadata.get("chunk_index")
+            document_id = metadata.get("document_id")
+            if any(span.text == text or text in span.text for span in spans):
+                continue
+
+            span = self._adjacent_span(spans, index, document_id)
+            if span is not None:
+                merged = merge_overlapping(span.text, text) if index == span.end + 1 else merge_overlapping(text, span.text)
+                cost = self.counter.count(merged) - self.counter.count(span.text)
+                if used + cost > budget:
+                    continue
+                span.text = merged
+                span.start, span.end = min(span.start, index), max(span.end, index)
+                span.chunks += 1
+            else:
+                cost = self.counter.count(text)
+                if used + cost > budget:
+                    continue
+                spans.append(_Span(start=index, end=index, text=text, document_id=document_id))
+            used += cost
+        return spans, used
+
+    @staticmethod
+    def _adjacent_span(spans: List[_Span], index: Optional[int], document_id: Optional[int]) -> Optional[_Span]:
+        if index is None:
+            return None
+        for span in spans:
+            if span.start is None or span.document_id != document_id:
+                continue
+            if index == span.end + 1 or index == span.start - 1:
+                return span
+        return None
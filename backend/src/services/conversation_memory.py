@@ -0,0 +1,56 @@
+import logging
+import os
+from src.database.db import AsyncSessionLocal
+from src.database.crud.chats import get_chats_between, get_conversation_summary, save_conversation_summary
+from .llm import LLMSummarizer
+
+# Number of latest turns sent verbatim with every query
+CHAT_HISTORY_WINDOW = int(os.getenv("CHAT_HISTORY_WINDOW", 8))
+# Older turns are folded into the summary once at least this many are pending
+CONVERSATION_SUMMARY_MIN_TURNS = int(os.getenv("CONVERSATION_SUMMARY_MIN_TURNS", 4))
+# Upper bound on the turns folded in by one update
+CONVERSATION_SUMMARY_MAX_TURNS = int(os.getenv("CONVERSATION_SUMMARY_MAX_TURNS", 40))
+
+# Projects whose summary is being updated by this worker
+_updating: set[int] = set()
+
+
+async def update_conversation_summary(
+    project_id: int,
+    oldest_recent_chat_id: int,
+    llm: LLMSummarizer
+) -> None:
+    """
+    Fold turns that have left the recent-history window into the project's
+    rolling summary.
+
+    Only turns newer than the summary's watermark and older than
+    `oldest_recent_chat_id` are read, so each update costs the same no matter
+    how long the conversation is. Runs as a background task after the answer
+    is sent; failures are logged and retried on a later query.
+    """
+    if project_id in _updating:
+        return
+    _updating.add(project_id)
+    try:
+        async with AsyncSessionLocal() as db:
+            current = await get_conversation_summary(db, project_id)
+            turns = await get_chats_between(
+                db,
+                project_id,
+                after_chat_id=current.last_chat_id if current else 0,
+                before_chat_id=oldest_recent_chat_id,
+                limit=CONVERSATION_SUMMARY_MAX_TURNS
+            )
+            if len(turns) < CONVERSATION_SUMMARY_MIN_TURNS:
+                return
+
+            summary = await llm.summarize_conversation(
+                previous_summary=current.summary if current else "",
+                turns="\n".join(f"{chat.sender_type}: {chat.message}" for chat in turns)
+            )
+            await save_conversation_summary(db, project_id, summary, turns[-1].chat_id)
+    except Exception as e:
+        logging.error(f"Conversation summary update failed for project {project_id}: {str(e)}")
+    finally:
+        _updating.discard(project_id)
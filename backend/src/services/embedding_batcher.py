@@ -0,0 +1,90 @@
+from typing import Callable, Dict, List, Set, Tuple
+import asyncio
+import os
+import time
+from .executors import run_blocking
+from .metrics import embedding_batch_size, embedding_batch_wait_seconds
+
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", 2))  # 0 disables batching
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", 32))
+
+
+class EmbeddingBatcher:
+    """
+    Collects query texts from concurrent requests and embeds them together.
+
+    The first text to arrive for a model opens a batch that is flushed after
+    `window_ms`, or as soon as it holds `max_batch_size` texts. The batch is
+    embedded in one call on the "embedding" pool and every caller gets its own
+    vector back, so N concurrent queries cost one forward pass instead of N.
+    Identical texts in a batch are embedded once.
+    """
+
+    def __init__(self, window_ms: float = 2.0, max_batch_size: int = 32):
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        # Per model: the open batch of (text, future, enqueued_at) and its flush timer
+        self._pending: Dict[str, List[Tuple[str, asyncio.Future, float]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._functions: Dict[str, Callable] = {}
+        self._running: Set[asyncio.Task] = set()
+
+    async def embed(self, model_name: str, embedding_func: Callable, text: str) -> List[float]:
+        """Embed `text` with `embedding_func`, batched with other texts for `model_name`"""
+        if self.window <= 0 or self.max_batch_size <= 1:
+            embedding_batch_size.observe(1)
+            return (await run_blocking("embedding", _embed_texts, embedding_func, [text]))[0]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(model_name, [])
+        self._functions[model_name] = embedding_func
+        batch.append((text, future, time.perf_counter()))
+        if len(batch) >= self.max_batch_size:
+            self._flush(model_name)
+        elif len(batch) == 1:
+            self._timers[model_name] = loop.call_later(self.window, self._flush, model_name)
+        return await future
+
+    def _flush(self, model_name: str) -> None:
+        timer = self._timers.pop(model_name, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(model_name, None)
+        if batch:
+            task = asyncio.ensure_future(self._run(self._functions[model_name], batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, embedding_func: Callable, batch: List[Tuple[str, asyncio.Future, float]]) -> None:
+        started = time.perf_counter()
+        for _, _, enqueued_at in batch:
+            embedding_batch_wait_seconds.observe(started - enqueued_at)
+        texts = list(dict.fromkeys(text for text, _, _ in batch))
+        embedding_batch_size.observe(len(texts))
+        try:
+            vectors = await run_blocking("embedding", _embed_texts, embedding_func, texts)
+        except asyncio.CancelledError:
+            for _, future, _ in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        by_text = dict(zip(texts, vectors))
+        for text, future, _ in batch:
+            # Callers that went away have cancelled their future
+            if not future.done():
+                future.set_result(by_text[text])
+
+
+def _embed_texts(embedding_func: Callable, texts: List[str]) -> List[List[float]]:
+    return [list(map(float, vector)) for vector in embedding_func(texts)]
+
+
+embedding_batcher = EmbeddingBatcher(
+    window_ms=EMBEDDING_BATCH_WINDOW_MS,
+    max_batch_size=EMBEDDING_BATCH_MAX_SIZE
+)
@@ -0,0 +1,131 @@
+from array import array
+from typing import Dict, List, Optional, Sequence
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed cache of document embeddings.
+
+    Entries are keyed by (model name, SHA-256 of the chunk text), so identical
+    chunks are embedded once no matter which project they belong to. Vectors are
+    stored as float32 blobs in a local SQLite file. When the cache grows past
+    `max_entries`, the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str = "embedding_cache.sqlite3", max_entries: int = 200_000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._entries = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the cache database on first use"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL,"
+                " text_hash TEXT NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " last_used REAL NOT NULL,"
+                " PRIMARY KEY (model, text_hash))"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)"
+            )
+            self._entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return self._conn
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Look up embeddings for `texts`; missing entries are returned as None"""
+        hashes = [self.hash_text(text) for text in texts]
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            conn = self._connect()
+            unique = list(set(hashes))
+            # Stay below SQLite's bound-parameter limit
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch]
+                ).fetchall()
+                for text_hash, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[text_hash] = vector.tolist()
+                if rows:
+                    conn.execute(
+                        f"UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash IN ({placeholders})",
+                        [time.time(), model, *batch]
+                    )
+            conn.commit()
+
+            results = [found.get(text_hash) for text_hash in hashes]
+            hits = sum(1 for vector in results if vector is not None)
+            self.hits += hits
+            self.misses += len(results) - hits
+        return results
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """Store embeddings and evict the least recently used entries if over the limit"""
+        now = time.time()
+        rows = [
+            (model, self.hash_text(text), array("f", vector).tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            conn = self._connect()
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._entries += conn.total_changes - before
+            if self._entries > self.max_entries:
+                # Evict down to 90% of the limit so eviction does not run on every insert
+                excess = self._entries - int(self.max_entries * 0.9)
+                conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                    (excess,)
+                )
+                self._entries -= excess
+                self.evictions += excess
+                logging.info(f"Embedding cache evicted {excess} entries")
+            conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit-rate counters and current size of the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": self._entries,
+                "max_entries": self.max_entries,
+            }
+
+
+embedding_cache = EmbeddingCache(
+    path=os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite3"),
+    max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 200_000))
+)
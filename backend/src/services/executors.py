@@ -0,0 +1,212 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import os
+import threading
+import time
+from fastapi import HTTPException, status
+
+
+class ExecutorSaturated(HTTPException):
+    """Raised when a pool's queue is full; surfaces as 503 with Retry-After"""
+
+    def __init__(self, pool: str):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Server busy ({pool} pool saturated), please retry",
+            headers={"Retry-After": "1"}
+        )
+        self.pool = pool
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict) -> tuple:
+    """Run `fn` in the worker and report when it started and finished"""
+    started = time.time()
+    result = fn(*args, **kwargs)
+    return result, started, time.time()
+
+
+class BoundedExecutor:
+    """
+    A named thread or process pool with a queue-depth limit.
+
+    At most `max_workers` calls run at once and `max_queue` more may wait;
+    further calls are rejected with ExecutorSaturated instead of piling up.
+    Background work uses `run_background`, which waits for a free worker instead.
+    Wait time (submit -> start) and run time are recorded per pool.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, use_processes: bool = False):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.max_run_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        """Create the pool on first use"""
+        with self._lock:
+            if self._executor is None:
+                if self.use_processes:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=f"{self.name}-pool"
+                    )
+            return self._executor
+
+    def _try_admit(self, limit: int) -> bool:
+        with self._lock:
+            if self.in_flight >= limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking call on the pool without blocking the event loop"""
+        if not self._try_admit(self.max_workers + self.max_queue):
+            with self._lock:
+                self.rejected += 1
+            raise ExecutorSaturated(self.name)
+        return await self._submit(fn, args, kwargs)
+
+    async def run_background(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Like `run`, but for work no client is waiting to retry: instead of being
+        rejected it waits until fewer than `max_workers` calls are in flight.
+        The queue is thereby left to request handlers.
+        """
+        delay = 0.005
+        while not self._try_admit(self.max_workers):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+        return await self._submit(fn, args, kwargs)
+
+    async def _submit(self, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        """
+        Run an admitted call; the caller has already counted it in `in_flight`.
+
+        The slot is released when the call itself finishes, not when the caller
+        stops waiting: a caller that times out or is cancelled leaves a running
+        call behind, which still occupies a worker.
+        """
+        submitted = time.time()
+        try:
+            future = self._get_executor().submit(partial(_timed_call, fn, args, kwargs))
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        result, started, finished = await asyncio.wrap_future(future)
+        self._record(max(started - submitted, 0.0), finished - started)
+        return result
+
+    def _release(self, future=None) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def _record(self, wait: float, run: float) -> None:
+        with self._lock:
+            self.completed += 1
+            self.wait_seconds += wait
+            self.run_seconds += run
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+            self.max_run_seconds = max(self.max_run_seconds, run)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            completed = self.completed or 1
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.wait_seconds / completed * 1000, 2),
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+                "avg_run_ms": round(self.run_seconds / completed * 1000, 2),
+                "max_run_ms": round(self.max_run_seconds * 1000, 2),
+            }
+
+    def recycle(self) -> None:
+        """
+        Terminate the workers of a process pool, e.g. one stuck on a runaway
+        call, and start a fresh pool on next use. Calls still running on the
+        old pool fail with BrokenProcessPool, which releases their slots.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        # ProcessPoolExecutor has no public way to stop running workers before Python 3.14
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _pool_size(name: str, default: int) -> int:
+    return int(os.getenv(f"EXECUTOR_{name.upper()}_WORKERS", default))
+
+
+def _queue_size(name: str, default: int) -> int:
+    return int(os.getenv(f"EXECUTOR_{name.upper()}_QUEUE", default))
+
+
+_cpus = os.cpu_count() or 1
+_parser_workers = int(os.getenv("PDF_PARSER_WORKERS", _cpus))
+
+# Separately sized pools, so slow work of one kind cannot starve the others.
+# Parsing runs PyPDF2 in processes; the rest release the GIL in C code or I/O.
+executors: Dict[str, BoundedExecutor] = {
+    "embedding": BoundedExecutor(
+        "embedding", _pool_size("embedding", min(4, _cpus)), _queue_size("embedding", 64)
+    ),
+    "parsing": BoundedExecutor(
+        "parsing",
+        _pool_size("parsing", _parser_workers),
+        _queue_size("parsing", 4 * _parser_workers),
+        use_processes=True
+    ),
+    "hashing": BoundedExecutor(
+        "hashing", _pool_size("hashing", _cpus), _queue_size("hashing", 64)
+    ),
+    "storage": BoundedExecutor(
+        "storage", _pool_size("storage", 8), _queue_size("storage", 64)
+    ),
+}
+
+
+async def run_blocking(pool: str, fn: Callable, *args, **kwargs) -> Any:
+    """Run `fn(*args, **kwargs)` on the named pool"""
+    return await executors[pool].run(fn, *args, **kwargs)
+
+
+async def run_background(pool: str, fn: Callable, *args, **kwargs) -> Any:
+    """Run `fn(*args, **kwargs)` on the named pool, waiting for capacity instead of failing"""
+    return await executors[pool].run_background(fn, *args, **kwargs)
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: executor.stats() for name, executor in executors.items()}
+
+
+def shutdown_executors() -> None:
+    for executor in executors.values():
+        executor.shutdown()
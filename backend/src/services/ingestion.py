@@ -0,0 +1,376 @@
+from functools import partial
+from pathlib import Path
+from typing import List, Optional
+import asyncio
+import logging
+import os
+import tempfile
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database.db import AsyncSessionLocal
+from src.database.crud.chats import create_system_chat
+from src.database.crud.documents import (
+    add_document_chunks, chunk_vector_id, delete_document_chunks, delete_document_rows,
+    find_indexed_document, find_project_document, get_document, get_failed_documents_with_chunks,
+    set_document_pdf, set_document_stats, set_document_summary
+)
+from src.database.crud.ingestion_jobs import create_ingestion_job, update_ingestion_job
+from src.database.crud.project import delete_file, upload_project_pdf, set_project_pdf
+from src.database.models.documents import Document
+from src.database.models.ingestion_jobs import IngestionJob
+from .answer_cache import answer_cache
+from .ingestion_pipeline import EMBED_BATCH_SIZE, index_pdf
+from .executors import run_background, run_blocking
+from .metrics import failures_total, ingestion_stage_seconds, record_stage
+from .ingestion_queue import ingestion_queue
+from .vector_store import VectorStore
+from .llm import LLMSummarizer
+
+# Attempts to remove the chunks of a failed job before leaving them to the startup sweep
+CLEANUP_ATTEMPTS = 3
+# Queued uploads wait here rather than in memory until a worker picks them up
+INGESTION_SPOOL_DIR = os.getenv("INGESTION_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "askpdf-ingestion"))
+
+
+class DocumentDeleted(Exception):
+    """The document was deleted while its ingestion job was running"""
+
+
+def _queue_full() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many uploads in progress, please retry later"
+    )
+
+
+def ensure_ingestion_capacity() -> None:
+    """
+    Reject an upload before any rows are written when the ingestion queue is full.
+
+    Raises:
+        HTTPException(503) if the queue is full
+    """
+    if ingestion_queue.is_full():
+        raise _queue_full()
+
+
+async def enqueue_document_ingestion(
+    db: AsyncSession,
+    project_id: int,
+    document_id: int,
+    owner_id: int,
+    pdf_content: bytes,
+    filename: str,
+    is_primary: bool = False,
+    content_hash: Optional[str] = None
+) -> IngestionJob:
+    """
+    Record a QUEUED ingestion job for a document and hand it to the ingestion queue.
+
+    The PDF is written to INGESTION_SPOOL_DIR first and the job only holds its
+    path, so pending jobs do not keep their uploads in memory.
+
+    Raises:
+        HTTPException(503) if the queue is full; the document and its job
+        rows are deleted first so a retry does not leave them behind
+    """
+    try:
+        pdf_path = await run_blocking("storage", _spool_upload, pdf_content)
+    except Exception:
+        await delete_document_rows(db, document_id)
+        raise
+    job = await create_ingestion_job(db, project_id, document_id)
+    try:
+        await ingestion_queue.enqueue(
+            job.id,
+            partial(
+                run_ingestion_job,
+                job_id=job.id,
+                project_id=project_id,
+                document_id=document_id,
+                owner_id=owner_id,
+                pdf_path=pdf_path,
+                filename=filename,
+                is_primary=is_primary,
+                content_hash=content_hash
+            )
+        )
+    except asyncio.QueueFull:
+        Path(pdf_path).unlink(missing_ok=True)
+        await delete_document_rows(db, document_id)
+        raise _queue_full()
+    return job
+
+
+def _spool_upload(pdf_content: bytes) -> str:
+    """Write a queued upload to the spool directory and return its path"""
+    os.makedirs(INGESTION_SPOOL_DIR, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=INGESTION_SPOOL_DIR, suffix=".pdf", delete=False) as spool_file:
+        spool_file.write(pdf_content)
+    return spool_file.name
+
+
+async def run_ingestion_job(
+    job_id: str,
+    project_id: int,
+    document_id: int,
+    owner_id: int,
+    pdf_path: str,
+    filename: str,
+    is_primary: bool = False,
+    content_hash: Optional[str] = None
+) -> None:
+    """
+    Upload, parse, chunk, embed and summarize one PDF of a project.
+
+    `pdf_path` is the spooled upload; it is read when the job starts and
+    removed when the job ends, whatever the outcome.
+
+    Runs on an IngestionQueue worker with its own database session. Progress is
+    persisted on the IngestionJob row as the job moves through
+    QUEUED -> PARSING -> EMBEDDING -> DONE; any error marks the job FAILED
+    with the error message instead of being swallowed. The summary is the
+    exception: if it fails, the job still finishes DONE with its indexed
+    chunks and the summary error is recorded on the job.
+
+    Chunks are stored under stable ids "<document_id>:<chunk_index>", so adding
+    a document never touches the vectors of the project's other documents.
+    The primary document's location is also stored on the project itself.
+    The PDF is uploaded to storage concurrently with parsing and embedding.
+
+    If a document with the same `content_hash` is already indexed in one of
+    the owner's projects, its S3 object, chunks, embeddings and summary are reused and nothing is uploaded,
+    parsed, embedded or summarized again. If it is already in the same
+    project, the job fails instead, so its chunks are not indexed twice.
+
+    The document may be deleted while the job runs. The job checks for it
+    after every chunk batch and, once it is gone, stops and removes whatever
+    it stored after the delete.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            await _ensure_document(db, document_id)
+            pdf_content = await run_background("storage", Path(pdf_path).read_bytes)
+            await update_ingestion_job(db, job_id, status="PARSING", progress=5)
+
+            if content_hash:
+                await _ensure_not_duplicate(db, project_id, document_id, content_hash)
+            source = await find_indexed_document(db, content_hash, owner_id, document_id) if content_hash else None
+            if source:
+                with record_stage(ingestion_stage_seconds, "dedup_copy"):
+                    copied = await _copy_indexed_document(db, job_id, source, project_id, document_id, is_primary)
+                if copied:
+                    await update_ingestion_job(db, job_id, status="DONE", progress=100)
+                    return
+
+            # Upload the original PDF while it is parsed and embedded. The
+            # upload does not touch the session, which the indexing callbacks use.
+            upload = asyncio.create_task(upload_project_pdf(owner_id, pdf_content, filename))
+            await update_ingestion_job(db, job_id, status="EMBEDDING", progress=10)
+            last_progress = 10
+
+            async def record_chunks(start_index: int, chunks: List[str]) -> None:
+                await _ensure_document(db, document_id)
+                await add_document_chunks(db, document_id, project_id, start_index, chunks)
+
+            async def report_progress(pages_done: int, page_count: int) -> None:
+                nonlocal last_progress
+                progress = 10 + int(80 * pages_done / page_count)
+                if progress > last_progress:
+                    last_progress = progress
+                    await update_ingestion_job(db, job_id, progress=progress)
+
+            try:
+                result = await index_pdf(
+                    pdf_content,
+                    VectorStore(project_id),
+                    metadata={"project_id": str(project_id), "document_id": document_id},
+                    chunk_id=partial(chunk_vector_id, document_id),
+                    on_chunks=record_chunks,
+                    on_progress=report_progress
+                )
+                await _ensure_document(db, document_id)
+            except BaseException:
+                await _discard_upload(upload)
+                raise
+            for stage, seconds in result.stage_seconds.items():
+                ingestion_stage_seconds.observe(seconds, stage=stage)
+
+            s3_key, s3_url = await upload
+            await set_document_pdf(db, document_id, s3_key, s3_url)
+            if is_primary:
+                await set_project_pdf(db, project_id, s3_key, s3_url)
+            await set_document_stats(db, document_id, result.page_count, result.chunk_count)
+
+            # The chunks are searchable now; a failed summary does not undo that
+            summary_error = await _summarize_document(db, project_id, document_id, result.summary_text)
+
+            await update_ingestion_job(db, job_id, status="DONE", progress=100, error=summary_error)
+        except DocumentDeleted:
+            logging.info(f"Document {document_id} was deleted during ingestion job {job_id}")
+            await db.rollback()
+            # The delete endpoint removed the vectors stored before it ran, not the later batches
+            await _discard_chunks(db, project_id, document_id)
+        except Exception as e:
+            logging.error(f"Ingestion job {job_id} for project {project_id} failed: {str(e)}")
+            failures_total.inc(stage="ingestion")
+            await db.rollback()
+            await _discard_chunks(db, project_id, document_id)
+            await update_ingestion_job(
+                db, job_id,
+                status="FAILED",
+                error=getattr(e, "detail", None) or str(e)
+            )
+        finally:
+            Path(pdf_path).unlink(missing_ok=True)
+            # The project's searchable content changed (a failed job's chunks
+            # were searchable until they were discarded), so cached answers are stale
+            answer_cache.invalidate_project(project_id)
+
+
+async def _summarize_document(
+    db: AsyncSession,
+    project_id: int,
+    document_id: int,
+    summary_text: str
+) -> Optional[str]:
+    """
+    Summarize an indexed document and post the summary to the project's chat.
+
+    Returns:
+        None on success, otherwise the error to record on the job
+    """
+    try:
+        with record_stage(ingestion_stage_seconds, "summarize"):
+            summary = await LLMSummarizer().summarize(summary_text)
+        if summary and await get_document(db, document_id):
+            await set_document_summary(db, document_id, summary)
+            await create_system_chat(
+                db=db,
+                project_id=project_id,
+                message=f"{summary}"
+            )
+        return None
+    except Exception as e:
+        logging.error(f"Summary of document {document_id} failed: {str(e)}")
+        failures_total.inc(stage="summarize")
+        await db.rollback()
+        return f"Summary failed: {getattr(e, 'detail', None) or str(e)}"
+
+
+async def _ensure_document(db: AsyncSession, document_id: int) -> None:
+    """Raise DocumentDeleted if the document no longer exists"""
+    if not await get_document(db, document_id):
+        raise DocumentDeleted(document_id)
+
+
+async def _ensure_not_duplicate(db: AsyncSession, project_id: int, document_id: int, content_hash: str) -> None:
+    """
+    Fail the job if an earlier document of the project has the same content.
+    The upload route rejects such duplicates, but two concurrent uploads can
+    both get past it; the older document is kept.
+    """
+    existing = await find_project_document(db, project_id, content_hash, exclude_document_id=document_id)
+    if existing and existing.id < document_id:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"This PDF is already in the project (document {existing.id})"
+        )
+
+
+async def _discard_upload(upload: asyncio.Task) -> None:
+    """Remove the PDF uploaded for a job whose indexing failed"""
+    try:
+        s3_key, _ = await upload
+        await delete_file(s3_key)
+    except Exception as e:
+        logging.error(f"Failed to discard upload: {str(e)}")
+
+
+async def _discard_chunks(db: AsyncSession, project_id: int, document_id: int) -> bool:
+    """
+    Remove the vectors, BM25 entries and chunk rows a failed job already stored.
+    Chunk batches are committed as they are indexed, so a rollback does not undo them.
+
+    The vectors are deleted first and the chunk rows only afterwards, so a
+    document whose cleanup keeps failing still has chunk rows and is picked
+    up again by `discard_failed_ingestions`. Returns whether the cleanup succeeded.
+    """
+    for attempt in range(CLEANUP_ATTEMPTS):
+        try:
+            # Not run_blocking: a saturated pool must not reject the cleanup
+            await run_background("embedding", VectorStore(project_id).delete_document, document_id)
+            await delete_document_chunks(db, document_id)
+            return True
+        except Exception as e:
+            logging.error(
+                f"Failed to discard chunks of document {document_id} "
+                f"(attempt {attempt + 1} of {CLEANUP_ATTEMPTS}): {str(e)}"
+            )
+            await db.rollback()
+            if attempt + 1 < CLEANUP_ATTEMPTS:
+                await asyncio.sleep(2 ** attempt)
+    return False
+
+
+async def discard_failed_ingestions() -> None:
+    """
+    Remove the chunks of failed jobs whose cleanup did not succeed at the time,
+    e.g. because the worker was restarted. Queued as a job on startup.
+    """
+    async with AsyncSessionLocal() as db:
+        for project_id, document_id in await get_failed_documents_with_chunks(db):
+            if await _discard_chunks(db, project_id, document_id):
+                answer_cache.invalidate_project(project_id)
+
+
+async def _copy_indexed_document(
+    db: AsyncSession,
+    job_id: str,
+    source: Document,
+    project_id: int,
+    document_id: int,
+    is_primary: bool
+) -> bool:
+    """
+    Populate a document from an identical, already indexed upload.
+
+    Vectors are copied with their stored embeddings under the new document's
+    ids. Returns False when the source has no vectors left, in which case the
+    caller ingests the PDF normally.
+    """
+    chunks = await run_background("embedding", VectorStore(source.project_id).get_document_chunks, source.id)
+    if not chunks:
+        return False
+
+    await set_document_pdf(db, document_id, source.s3_key, source.url)
+    if is_primary:
+        await set_project_pdf(db, project_id, source.s3_key, source.url)
+    await update_ingestion_job(db, job_id, status="EMBEDDING", progress=20)
+
+    vector_store = VectorStore(project_id)
+    for start in range(0, len(chunks), EMBED_BATCH_SIZE):
+        batch = chunks[start:start + EMBED_BATCH_SIZE]
+        texts = [chunk["document"] for chunk in batch]
+        await _ensure_document(db, document_id)
+        await vector_store.add_texts(
+            texts=texts,
+            metadatas=[
+                {"project_id": str(project_id), "document_id": document_id, "chunk_index": start + i}
+                for i in range(len(batch))
+            ],
+            ids=[chunk_vector_id(document_id, start + i) for i in range(len(batch))],
+            embeddings=[chunk["embedding"] for chunk in batch]
+        )
+        await add_document_chunks(db, document_id, project_id, start, texts)
+    await _ensure_document(db, document_id)
+    await set_document_stats(db, document_id, source.page_count, len(chunks))
+
+    if source.summary:
+        await set_document_summary(db, document_id, source.summary)
+        await create_system_chat(
+            db=db,
+            project_id=project_id,
+            message=f"{source.summary}"
+        )
+    return True
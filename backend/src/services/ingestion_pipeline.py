@@ -0,0 +1,105 @@
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+import os
+import time
+from .pdf_parser import PDFParser
+from .text_chunker import TextChunker
+from .vector_store import VectorStore
+
+# Number of chunks embedded and inserted per collection.add call
+EMBED_BATCH_SIZE = int(os.getenv("INGESTION_EMBED_BATCH_SIZE", 64))
+# Upper bound on the text kept for the document summary
+SUMMARY_INPUT_MAX_CHARS = int(os.getenv("SUMMARY_INPUT_MAX_CHARS", 1_000_000))
+
+
+@dataclass
+class PipelineResult:
+    page_count: int = 0
+    chunk_count: int = 0
+    summary_pages: List[str] = field(default_factory=list)
+    # Seconds spent waiting on the parser, chunking and embedding + inserting
+    stage_seconds: Dict[str, float] = field(default_factory=lambda: {"pdf_parse": 0.0, "chunk": 0.0, "embed": 0.0})
+
+    @property
+    def summary_text(self) -> str:
+        return "\n".join(self.summary_pages)
+
+
+async def index_pdf(
+    pdf_content: bytes,
+    vector_store: VectorStore,
+    metadata: Dict,
+    chunker: Optional[TextChunker] = None,
+    batch_size: int = EMBED_BATCH_SIZE,
+    chunk_id: Callable[[int], str] = str,
+    on_chunks: Optional[Callable[[int, List[str]], Awaitable[None]]] = None,
+    on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None
+) -> PipelineResult:
+    """
+    Stream a PDF through parse -> chunk -> embed without building the whole
+    document in memory.
+
+    Pages stream out of PDFParser, the incremental chunker emits chunks as soon
+    as they are full, and chunks are embedded and inserted in batches of
+    `batch_size`. Each chunk gets `metadata` plus its `chunk_index`, and its
+    vector id is `chunk_id(chunk_index)`.
+
+    Page text is also collected for the summary, up to SUMMARY_INPUT_MAX_CHARS.
+    `on_chunks(start_index, chunks)` is awaited after every inserted batch and
+    `on_progress(pages_done, page_count)` after every page. Time spent in each
+    stage is accumulated in `PipelineResult.stage_seconds`.
+    """
+    chunker = chunker or TextChunker()
+    stream = chunker.stream()
+    result = PipelineResult()
+    summary_chars = 0
+    batch: List[str] = []
+
+    async def insert(chunks: List[str]) -> None:
+        start = result.chunk_count
+        started = time.perf_counter()
+        await vector_store.add_texts(
+            texts=chunks,
+            metadatas=[{**metadata, "chunk_index": start + i} for i in range(len(chunks))],
+            ids=[chunk_id(start + i) for i in range(len(chunks))]
+        )
+        result.stage_seconds["embed"] += time.perf_counter() - started
+        result.chunk_count += len(chunks)
+        if on_chunks:
+            await on_chunks(start, chunks)
+
+    pages = PDFParser.iter_pages_from_bytes(pdf_content)
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                page_index, page_count, text = await anext(pages)
+            except StopAsyncIteration:
+                break
+            finally:
+                result.stage_seconds["pdf_parse"] += time.perf_counter() - started
+            result.page_count = page_count
+            if summary_chars < SUMMARY_INPUT_MAX_CHARS:
+                result.summary_pages.append(text[:SUMMARY_INPUT_MAX_CHARS - summary_chars])
+                summary_chars += len(result.summary_pages[-1])
+
+            started = time.perf_counter()
+            batch.extend(stream.feed(text))
+            result.stage_seconds["chunk"] += time.perf_counter() - started
+            while len(batch) >= batch_size:
+                await insert(batch[:batch_size])
+                batch = batch[batch_size:]
+
+            if on_progress:
+                await on_progress(page_index + 1, page_count)
+    finally:
+        # Stop extraction of pages that will not be read (errors in later stages)
+        await pages.aclose()
+
+    started = time.perf_counter()
+    batch.extend(stream.flush())
+    result.stage_seconds["chunk"] += time.perf_counter() - started
+    for start in range(0, len(batch), batch_size):
+        await insert(batch[start:start + batch_size])
+
+    return result
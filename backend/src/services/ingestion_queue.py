@@ -0,0 +1,82 @@
+from typing import Awaitable, Callable, List, Optional
+import asyncio
+import logging
+import os
+from .metrics import ingestion_jobs_in_flight
+
+
+class IngestionQueue:
+    """
+    In-process job queue that runs document ingestion outside the HTTP request.
+
+    Jobs are coroutine factories executed by a fixed number of worker tasks, so at
+    most `max_workers` ingestions run concurrently per worker process. The queue
+    holds at most `max_pending` waiting jobs; `enqueue` raises asyncio.QueueFull
+    beyond that. Job state itself is persisted by the handlers (see
+    src.services.ingestion), not by the queue.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 100):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self) -> None:
+        """Start the worker tasks on the running event loop"""
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"ingestion-worker-{i}")
+            for i in range(self.max_workers)
+        ]
+
+    async def stop(self) -> None:
+        """Cancel the worker tasks; jobs still waiting in the queue are dropped"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    async def join(self) -> None:
+        """Wait until every queued job has finished"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def enqueue(self, job_id: str, handler: Callable[[], Awaitable[None]]) -> None:
+        """Queue a job for background execution"""
+        if not self.is_running:
+            await self.start()
+        self._queue.put_nowait((job_id, handler))
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def is_full(self) -> bool:
+        return self.pending() >= self.max_pending > 0
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            job_id, handler = await self._queue.get()
+            try:
+                with ingestion_jobs_in_flight.track():
+                    await handler()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Handlers record their own failures; this only guards the worker loop
+                logging.error(f"Ingestion job {job_id} crashed on worker {worker_id}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+
+ingestion_queue = IngestionQueue(
+    max_workers=int(os.getenv("INGESTION_WORKERS", 2)),
+    max_pending=int(os.getenv("INGESTION_MAX_PENDING", 100))
+)
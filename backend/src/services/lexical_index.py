@@ -0,0 +1,161 @@
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+import math
+import os
+import re
+import sqlite3
+import threading
+
+# Words, numbers and compound identifiers such as "7.3.2", "INV-2024-001" or "a/b"
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[._\-/][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase and split text into BM25 terms.
+
+    Compound identifiers are kept whole and also indexed by their parts, so a
+    query for "7.3.2" or "INV-2024-001" matches exactly while "2024" still
+    matches the part.
+    """
+    terms = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        terms.append(token)
+        if not token.isalnum():
+            terms.extend(part for part in re.split(r"[._\-/]", token) if part)
+    return terms
+
+
+class LexicalIndex:
+    """
+    Per-project BM25 index over the same chunks as the vector store.
+
+    Postings and document lengths are kept in a local SQLite file, so documents
+    can be added and removed incrementally and a search only reads the postings
+    of the query terms.
+    """
+
+    def __init__(self, path: str = "bm25_index.sqlite3", k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the index database on first use"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " project_id TEXT NOT NULL,"
+                " doc_id TEXT NOT NULL,"
+                " length INTEGER NOT NULL,"
+                " PRIMARY KEY (project_id, doc_id))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS postings ("
+                " project_id TEXT NOT NULL,"
+                " term TEXT NOT NULL,"
+                " doc_id TEXT NOT NULL,"
+                " tf INTEGER NOT NULL,"
+                " PRIMARY KEY (project_id, term, doc_id))"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_postings_doc ON postings (project_id, doc_id)"
+            )
+        return self._conn
+
+    def add_documents(self, project_id: str, ids: Sequence[str], texts: Sequence[str]) -> None:
+        """Index (or re-index) documents of a project"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                self._delete(conn, project_id, ids)
+                for doc_id, text in zip(ids, texts):
+                    terms = Counter(tokenize(text))
+                    conn.execute(
+                        "INSERT INTO documents (project_id, doc_id, length) VALUES (?, ?, ?)",
+                        (project_id, doc_id, sum(terms.values()))
+                    )
+                    conn.executemany(
+                        "INSERT INTO postings (project_id, term, doc_id, tf) VALUES (?, ?, ?, ?)",
+                        [(project_id, term, doc_id, tf) for term, tf in terms.items()]
+                    )
+                conn.commit()
+            except Exception:
+                # Don't leave a half-indexed batch for the next commit on this connection
+                conn.rollback()
+                raise
+
+    def delete_documents(self, project_id: str, ids: Sequence[str]) -> None:
+        """Remove documents of a project from the index"""
+        with self._lock:
+            conn = self._connect()
+            self._delete(conn, project_id, ids)
+            conn.commit()
+
+    def delete_project(self, project_id: str) -> None:
+        """Drop the whole index of a project"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM postings WHERE project_id = ?", (project_id,))
+            conn.execute("DELETE FROM documents WHERE project_id = ?", (project_id,))
+            conn.commit()
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, project_id: str, ids: Sequence[str]) -> None:
+        for start in range(0, len(ids), 500):
+            batch = list(ids[start:start + 500])
+            placeholders = ",".join("?" * len(batch))
+            conn.execute(
+                f"DELETE FROM postings WHERE project_id = ? AND doc_id IN ({placeholders})",
+                [project_id, *batch]
+            )
+            conn.execute(
+                f"DELETE FROM documents WHERE project_id = ? AND doc_id IN ({placeholders})",
+                [project_id, *batch]
+            )
+
+    def search(self, project_id: str, query: str, k: int = 4) -> List[Tuple[str, float]]:
+        """Return the top `k` (doc_id, bm25_score) pairs for a query"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            conn = self._connect()
+            num_docs, total_length = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM documents WHERE project_id = ?",
+                (project_id,)
+            ).fetchone()
+            if not num_docs:
+                return []
+            placeholders = ",".join("?" * len(terms))
+            rows = conn.execute(
+                f"SELECT p.term, p.doc_id, p.tf, d.length FROM postings p "
+                f"JOIN documents d ON d.project_id = p.project_id AND d.doc_id = p.doc_id "
+                f"WHERE p.project_id = ? AND p.term IN ({placeholders})",
+                [project_id, *terms]
+            ).fetchall()
+
+        avg_length = total_length / num_docs
+        doc_freq = Counter(term for term, _, _, _ in rows)
+        scores: Dict[str, float] = {}
+        for term, doc_id, tf, length in rows:
+            idf = math.log(1 + (num_docs - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            norm = tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse several ranked id lists; each id scores sum(1 / (k + rank))"""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+lexical_index = LexicalIndex(path=os.getenv("LEXICAL_INDEX_PATH", "bm25_index.sqlite3"))
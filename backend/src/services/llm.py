@@ -1,50 +1,140 @@
-from typing import Optional
+from typing import AsyncIterator, List, Optional
+import asyncio
 import logging
-import google.generativeai as genai
 import os
-from .prompt import get_pdf_analysis_prompt, get_qa_prompt
+from .executors import run_background
+from .llm_provider import GeminiProvider, LLMProvider, get_llm_provider, llm_quota
+from .prompt import (
+    get_pdf_analysis_prompt,
+    get_qa_prompt,
+    get_section_summary_prompt,
+    get_summary_reduce_prompt,
+    get_conversation_summary_prompt,
+)
+from .summary_cache import summary_cache
+from .text_chunker import TextChunker
 
 class LLMSummarizer:
-    # Class-level initialization with Gemini API key
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")  # Get from environment variable
-    if not GEMINI_API_KEY:
-        raise ValueError("GEMINI_API_KEY environment variable not set")
-    
-    genai.configure(api_key=GEMINI_API_KEY)
-    MODEL_NAME = "gemini-2.0-flash"  # Default model
-    
-    def __init__(self):
-        self.llm = self._initialize_llm()
-    
-    def _initialize_llm(self):
-        """Initialize Gemini LLM connection."""
-        try:
-            return genai.GenerativeModel(self.MODEL_NAME)
-        except Exception as e:
-            logging.error(f"Failed to initialize Gemini: {str(e)}")
-            raise
+    # Map-reduce summarization settings for large documents
+    SUMMARY_MAP_REDUCE_THRESHOLD = int(os.getenv("SUMMARY_MAP_REDUCE_THRESHOLD", 100_000))  # characters
+    SUMMARY_SECTION_SIZE = int(os.getenv("SUMMARY_SECTION_SIZE", 30_000))  # characters per section
+    SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", 4))  # concurrent section calls
     
+    def __init__(self, llm=None, provider: Optional[LLMProvider] = None):
+        # Defaults to the worker's provider (LLM_PROVIDER). An object with
+        # Gemini's generate_content_async interface can still be injected as `llm`.
+        if provider is None:
+            provider = GeminiProvider(model=llm) if llm is not None else get_llm_provider()
+        self.provider = provider
+
+    @property
+    def model_name(self) -> str:
+        return self.provider.model_name
+
+    async def _generate(self, prompt: str) -> str:
+        """One completion under the worker's shared rate limit, concurrency cap and retry policy"""
+        return await llm_quota.call(self.provider, lambda: self.provider.generate(prompt))
+
     async def answer_with_context(self, query: str, context_docs: str) -> str:
         try:
             prompt = get_qa_prompt(context_docs,query)
 
-            response = await self.llm.generate_content_async(prompt)
-            return response.text.strip()
+            response = await self._generate(prompt)
+            return response.strip()
         except Exception as e:
             logging.error(f"LLM query failed: {str(e)}")
             raise
 
+    async def stream_answer_with_context(self, query: str, context_docs: str) -> AsyncIterator[str]:
+        """Yield answer text chunks as the model generates them."""
+        pieces = None
+        try:
+            prompt = get_qa_prompt(context_docs, query)
+
+            pieces = llm_quota.stream(self.provider, prompt)
+            async for text in pieces:
+                yield text
+        except Exception as e:
+            logging.error(f"LLM streaming query failed: {str(e)}")
+            raise
+        finally:
+            if pieces is not None:
+                await pieces.aclose()
+
+    async def summarize_conversation(self, previous_summary: str, turns: str) -> str:
+        """Fold older chat turns into the rolling conversation summary."""
+        try:
+            prompt = get_conversation_summary_prompt(previous_summary, turns)
+
+            response = await self._generate(prompt)
+            return response.strip()
+        except Exception as e:
+            logging.error(f"Conversation summary failed: {str(e)}")
+            raise
+
     async def summarize(self, text: str, max_length: Optional[int] = 500) -> str:
-        """Generate summary of text using Gemini."""
+        """
+        Generate summary of text using Gemini.
+
+        Documents up to SUMMARY_MAP_REDUCE_THRESHOLD characters are summarized in
+        a single call. Larger ones are split into sections that are summarized
+        concurrently (at most SUMMARY_CONCURRENCY calls at a time) and then reduced
+        into the final summary. Section and final summaries are cached per
+        document hash.
+        """
         try:
-            prompt =  get_pdf_analysis_prompt(text)
-            
-            response = await self.llm.generate_content_async(prompt)
-            return response.text
-        
-    
+            if len(text) <= self.SUMMARY_MAP_REDUCE_THRESHOLD:
+                prompt =  get_pdf_analysis_prompt(text)
+
+                return await self._generate(prompt)
+
+            doc_hash = summary_cache.hash_document(text)
+            # The cache blocks on SQLite; summaries are only made by ingestion jobs
+            cached = await run_background("storage", summary_cache.get, self.model_name, doc_hash, "final")
+            if cached:
+                return cached
+
+            section_summaries = await self._summarize_sections(text, doc_hash)
+            # Summarize the summaries again while they are still too large, as long as that shrinks them
+            level = 1
+            total = sum(map(len, section_summaries))
+            while len(section_summaries) > 1 and total > self.SUMMARY_MAP_REDUCE_THRESHOLD:
+                reduced = await self._summarize_sections(
+                    "\n\n".join(section_summaries), doc_hash, level=level
+                )
+                if sum(map(len, reduced)) >= total:
+                    break
+                section_summaries, total = reduced, sum(map(len, reduced))
+                level += 1
+
+            response = await self._generate(get_summary_reduce_prompt(section_summaries))
+            await run_background("storage", summary_cache.put, self.model_name, doc_hash, "final", response)
+            return response
+
         except Exception as e:
             logging.error(f"Summarization failed: {str(e)}")
             raise
-    
-    
\ No newline at end of file
+
+    async def _summarize_sections(self, text: str, doc_hash: str, level: int = 0) -> List[str]:
+        """Map step: summarize each section of `text`, reusing cached section summaries"""
+        sections = TextChunker(
+            chunk_size=self.SUMMARY_SECTION_SIZE,
+            chunk_overlap=0
+        ).chunk_text(text)
+        semaphore = asyncio.Semaphore(self.SUMMARY_CONCURRENCY)
+
+        async def summarize_section(index: int, section: str) -> str:
+            key = f"{level}:{self.SUMMARY_SECTION_SIZE}:{index}"
+            cached = await run_background("storage", summary_cache.get, self.model_name, doc_hash, key)
+            if cached:
+                return cached
+            async with semaphore:
+                response = await self._generate(
+                    get_section_summary_prompt(section, index + 1, len(sections))
+                )
+            await run_background("storage", summary_cache.put, self.model_name, doc_hash, key, response)
+            return response
+
+        return list(await asyncio.gather(*[
+            summarize_section(i, section) for i, section in enumerate(sections)
+        ]))
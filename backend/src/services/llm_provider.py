@@ -0,0 +1,344 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+from fastapi import HTTPException, status
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")  # "gemini" or "fake"
+LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME", "gemini-2.0-flash")
+
+# Quota shared by every LLM call of this worker (QA, streaming, summaries)
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", 600))  # 0 disables rate limiting
+LLM_BURST = int(os.getenv("LLM_BURST", 20))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 60))  # per call, or per streamed chunk
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 3))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", 0.5))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", 8))
+
+T = TypeVar("T")
+
+
+class LLMUnavailable(HTTPException):
+    """The provider kept failing with retryable errors; the caller should retry later"""
+
+    def __init__(self, detail: str = "The language model is temporarily unavailable"):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(max(1, int(LLM_RETRY_MAX_SECONDS)))}
+        )
+
+
+class LLMProvider(ABC):
+    """Interface of a text generation backend"""
+
+    model_name = ""
+
+    @abstractmethod
+    async def generate(self, prompt: str) -> str:
+        """Return the full response to `prompt`"""
+
+    @abstractmethod
+    def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yield the response to `prompt` piece by piece"""
+
+    def is_retryable(self, error: BaseException) -> bool:
+        """Whether the call that raised `error` may succeed if repeated"""
+        return isinstance(error, (asyncio.TimeoutError, ConnectionError))
+
+
+class GeminiProvider(LLMProvider):
+    """
+    Google Gemini through google.generativeai.
+
+    `model` may be any object with GenerativeModel's generate_content_async
+    interface; by default one is created for `model_name`, which requires
+    GEMINI_API_KEY.
+    """
+
+    _configured = False
+
+    def __init__(self, model_name: str = LLM_MODEL_NAME, model=None):
+        self.model_name = model_name
+        self.model = model or self._initialize_model()
+
+    def _initialize_model(self):
+        import google.generativeai as genai
+
+        if not GeminiProvider._configured:
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY environment variable not set")
+            genai.configure(api_key=api_key)
+            GeminiProvider._configured = True
+        try:
+            return genai.GenerativeModel(self.model_name)
+        except Exception as e:
+            logging.error(f"Failed to initialize Gemini: {str(e)}")
+            raise
+
+    async def generate(self, prompt: str) -> str:
+        response = await self.model.generate_content_async(prompt)
+        return response.text
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        response = await self.model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+    def is_retryable(self, error: BaseException) -> bool:
+        if super().is_retryable(error):
+            return True
+        try:
+            from google.api_core import exceptions as api_exceptions
+        except ImportError:
+            return False
+        return isinstance(error, (
+            api_exceptions.TooManyRequests,
+            api_exceptions.ResourceExhausted,
+            api_exceptions.InternalServerError,
+            api_exceptions.BadGateway,
+            api_exceptions.ServiceUnavailable,
+            api_exceptions.GatewayTimeout,
+            api_exceptions.DeadlineExceeded,
+        ))
+
+
+class FakeProvider(LLMProvider):
+    """
+    Deterministic local stand-in for tests, benchmarks and development.
+
+    The answer is derived from a hash of the prompt, so the same prompt always
+    gets the same text. Each call waits `latency_ms` (plus up to `jitter_ms`)
+    before the first piece and `chunk_delay_ms` per piece after it.
+    """
+
+    WORDS = (
+        "the document states that payment is due within thirty days of delivery "
+        "and either party may terminate the agreement with written notice"
+    ).split()
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, chunks: int = 8, chunk_delay_ms: float = 0):
+        self.model_name = "fake"
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.chunks = chunks
+        self.chunk_delay = chunk_delay_ms / 1000
+        self.calls = 0
+
+    def _pieces(self, prompt: str) -> list:
+        seed = int(hashlib.sha256(prompt.encode()).hexdigest(), 16)
+        rng = random.Random(seed)
+        return [
+            " ".join(rng.choice(self.WORDS) for _ in range(4)) + " "
+            for _ in range(self.chunks)
+        ]
+
+    async def _wait_first_piece(self, prompt: str) -> None:
+        self.calls += 1
+        jitter = random.Random(prompt).random() * self.jitter
+        await asyncio.sleep(self.latency + jitter)
+
+    async def generate(self, prompt: str) -> str:
+        await self._wait_first_piece(prompt)
+        await asyncio.sleep(self.chunk_delay * self.chunks)
+        return "".join(self._pieces(prompt)).strip()
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        await self._wait_first_piece(prompt)
+        for piece in self._pieces(prompt):
+            await asyncio.sleep(self.chunk_delay)
+            yield piece
+
+
+class TokenBucket:
+    """Async token bucket: `rate` calls per second on average, bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Take one token, waiting for it if necessary; returns the seconds waited"""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        # The lock queues waiters in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+class LLMQuota:
+    """
+    Call policy shared by every LLM call of the worker: a token-bucket rate
+    limit, a cap on concurrent calls, a timeout per call and jittered
+    exponential backoff for retryable errors.
+
+    The bucket and semaphore are created on first use so they belong to the
+    running event loop.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        burst: int,
+        max_concurrency: int,
+        timeout_seconds: float,
+        max_retries: int,
+        retry_base_seconds: float,
+        retry_max_seconds: float
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._bucket: Optional[TokenBucket] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._stats_lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.throttled_seconds = 0.0
+
+    def _limits(self) -> tuple:
+        if self._semaphore is None:
+            self._bucket = TokenBucket(self.requests_per_minute / 60, self.burst)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._bucket, self._semaphore
+
+    def _count(self, **amounts) -> None:
+        with self._stats_lock:
+            for name, amount in amounts.items():
+                setattr(self, name, getattr(self, name) + amount)
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number `attempt` (0-based)"""
+        return random.uniform(0, min(self.retry_max_seconds, self.retry_base_seconds * 2 ** attempt))
+
+    async def _retry_or_raise(self, provider: LLMProvider, error: BaseException, attempt: int) -> None:
+        if not provider.is_retryable(error):
+            self._count(failures=1)
+            raise error
+        if attempt >= self.max_retries:
+            self._count(failures=1)
+            logging.error(f"LLM call failed after {attempt + 1} attempts: {str(error) or type(error).__name__}")
+            raise LLMUnavailable() from error
+        delay = self.backoff(attempt)
+        logging.warning(f"Retrying LLM call in {delay:.2f}s after: {str(error) or type(error).__name__}")
+        self._count(retries=1)
+        await asyncio.sleep(delay)
+
+    async def call(self, provider: LLMProvider, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run `fn` (one provider call) under the quota, retrying retryable errors"""
+        bucket, semaphore = self._limits()
+        attempt = 0
+        while True:
+            self._count(throttled_seconds=await bucket.acquire())
+            async with semaphore:
+                self._count(calls=1, in_flight=1)
+                try:
+                    return await asyncio.wait_for(fn(), self.timeout_seconds)
+                except Exception as e:
+                    error = e
+                finally:
+                    self._count(in_flight=-1)
+            await self._retry_or_raise(provider, error, attempt)
+            attempt += 1
+
+    async def stream(self, provider: LLMProvider, prompt: str) -> AsyncIterator[str]:
+        """
+        Stream `prompt` under the quota. The call is retried only until the
+        first piece arrives; after that an error is raised to the caller.
+        Each piece must arrive within the timeout.
+        """
+        bucket, semaphore = self._limits()
+        attempt = 0
+        while True:
+            self._count(throttled_seconds=await bucket.acquire())
+            started = False
+            async with semaphore:
+                self._count(calls=1, in_flight=1)
+                pieces = provider.stream(prompt)
+                try:
+                    while True:
+                        try:
+                            piece = await asyncio.wait_for(pieces.__anext__(), self.timeout_seconds)
+                        except StopAsyncIteration:
+                            return
+                        started = True
+                        yield piece
+                except Exception as e:
+                    if started:
+                        self._count(failures=1)
+                        raise
+                    error = e
+                finally:
+                    self._count(in_flight=-1)
+                    await pieces.aclose()
+            await self._retry_or_raise(provider, error, attempt)
+            attempt += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "failures": self.failures,
+                "in_flight": self.in_flight,
+                "throttled_seconds": round(self.throttled_seconds, 3),
+            }
+
+
+llm_quota = LLMQuota(
+    requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+    burst=LLM_BURST,
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    timeout_seconds=LLM_TIMEOUT_SECONDS,
+    max_retries=LLM_MAX_RETRIES,
+    retry_base_seconds=LLM_RETRY_BASE_SECONDS,
+    retry_max_seconds=LLM_RETRY_MAX_SECONDS
+)
+
+_provider: Optional[LLMProvider] = None
+
+
+def get_llm_provider() -> LLMProvider:
+    """The worker's provider, chosen by LLM_PROVIDER and created on first use"""
+    global _provider
+    if _provider is None:
+        if LLM_PROVIDER == "fake":
+            _provider = FakeProvider(latency_ms=float(os.getenv("LLM_FAKE_LATENCY_MS", 0)))
+        elif LLM_PROVIDER == "gemini":
+            _provider = GeminiProvider()
+        else:
+            raise ValueError(f"Unknown LLM_PROVIDER: {LLM_PROVIDER}")
+    return _provider
+
+
+def set_llm_provider(provider: LLMProvider) -> None:
+    """Replace the worker's provider (e.g. with a FakeProvider in tests)"""
+    global _provider
+    _provider = provider
@@ -1,24 +1,139 @@
-from io import BytesIO
+from collections import deque
+from typing import AsyncIterator, List, Optional, Tuple
+import asyncio
+import hashlib
+import itertools
+import math
+import os
+import tempfile
 import PyPDF2
 from fastapi import HTTPException
+from .executors import executors
+
+# Per-document timeout for page extraction; workers come from the "parsing" pool
+PDF_PARSER_TIMEOUT_SECONDS = float(os.getenv("PDF_PARSER_TIMEOUT_SECONDS", 120))
+# Documents shorter than this are extracted as a single range
+PDF_PARSER_MIN_PAGES_PER_RANGE = int(os.getenv("PDF_PARSER_MIN_PAGES_PER_RANGE", 16))
+
+# Bytes read from an upload per await while hashing it
+UPLOAD_READ_CHUNK_SIZE = 1024 * 1024
+
+
+def _write_temp_pdf(pdf_content: bytes) -> str:
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as pdf_file:
+        pdf_file.write(pdf_content)
+    return pdf_file.name
+
+
+def _count_pages(pdf_path: str) -> int:
+    return len(PyPDF2.PdfReader(pdf_path).pages)
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> List[str]:
+    """Extract the text of pages [start, end) in a worker process"""
+    pdf_reader = PyPDF2.PdfReader(pdf_path)
+    return [pdf_reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def _split_page_ranges(num_pages: int, workers: int) -> List[tuple]:
+    """Split pages into contiguous ranges, about two per worker"""
+    if num_pages == 0:
+        return []
+    range_size = max(PDF_PARSER_MIN_PAGES_PER_RANGE, math.ceil(num_pages / (workers * 2)))
+    return [(start, min(start + range_size, num_pages)) for start in range(0, num_pages, range_size)]
+
 
 class PDFParser:
     @staticmethod
     async def extract_text_from_pdf(pdf_file) -> str:
         """Extract text content from PDF file."""
+        pdf_content = await pdf_file.read()
+        await pdf_file.seek(0)  # Reset file pointer
+        return await PDFParser.extract_text_from_bytes(pdf_content)
+
+    @staticmethod
+    async def extract_text_from_bytes(pdf_content: bytes) -> str:
+        """Extract text content from raw PDF bytes."""
+        pages = await PDFParser.extract_pages_from_bytes(pdf_content)
+        return "".join(pages)
+
+    @staticmethod
+    async def extract_pages_from_bytes(pdf_content: bytes, timeout: Optional[float] = None) -> List[str]:
+        """
+        Extract the text of every page, keeping page boundaries.
+
+        Returns:
+            One string per page, in page order
+        """
+        return [text async for _, _, text in PDFParser.iter_pages_from_bytes(pdf_content, timeout)]
+
+    @staticmethod
+    async def iter_pages_from_bytes(
+        pdf_content: bytes,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[Tuple[int, int, str]]:
+        """
+        Stream page texts as they are extracted.
+
+        Pages are split into contiguous ranges that are extracted in parallel on
+        the "parsing" process pool, so the event loop is never blocked by PyPDF2. Only one range per worker is in flight at a time, which
+        keeps memory bounded for long documents. Parsing only runs in background
+        ingestion jobs, so a busy pool is waited for rather than rejected.
+
+        The PDF is written to a temporary file once and workers read it from
+        there, instead of every range pickling the whole document to its worker.
+        On timeout the parsing pool is recycled, since a worker stuck in PyPDF2
+        cannot be cancelled; ranges of other documents being parsed at that
+        moment fail as well. The whole document must finish
+        within `timeout` seconds (PDF_PARSER_TIMEOUT_SECONDS by default).
+
+        Yields:
+            (page_index, page_count, text) tuples, in page order
+        """
+        timeout = timeout or PDF_PARSER_TIMEOUT_SECONDS
+        loop = asyncio.get_running_loop()
+        pool = executors["parsing"]
+        deadline = loop.time() + timeout
+        pending = deque()
+        pdf_path = None
+
+        def remaining() -> float:
+            return max(deadline - loop.time(), 0)
+
         try:
-            pdf_content = await pdf_file.read()
-            pdf_reader = PyPDF2.PdfReader(BytesIO(pdf_content))
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() or ""
-            await pdf_file.seek(0)  # Reset file pointer
-            return text
+            pdf_path = await executors["storage"].run_background(_write_temp_pdf, pdf_content)
+            num_pages = await asyncio.wait_for(
+                pool.run_background(_count_pages, pdf_path),
+                timeout=remaining()
+            )
+            page_ranges = iter(_split_page_ranges(num_pages, pool.max_workers))
+            page_index = 0
+            while True:
+                # Keep one range per worker in flight, consumed in page order
+                for start, end in itertools.islice(page_ranges, pool.max_workers - len(pending)):
+                    pending.append(asyncio.ensure_future(pool.run_background(_extract_page_range, pdf_path, start, end)))
+                if not pending:
+                    break
+                for text in await asyncio.wait_for(pending.popleft(), timeout=remaining()):
+                    yield page_index, num_pages, text
+                    page_index += 1
+        except asyncio.TimeoutError:
+            pool.recycle()
+            raise HTTPException(
+                status_code=422,
+                detail=f"PDF parsing timed out after {timeout:g} seconds"
+            )
         except Exception as e:
             raise HTTPException(
                 status_code=422,
                 detail=f"PDF parsing failed: {str(e)}"
             )
+        finally:
+            # Drop ranges that have not started yet (timeout, error or early exit)
+            for future in pending:
+                future.cancel()
+            if pdf_path is not None:
+                os.unlink(pdf_path)
 
     @staticmethod
     def validate_pdf_file(pdf_file) -> None:
@@ -28,6 +143,28 @@ class PDFParser:
                 status_code=400,
                 detail="Only PDF files are allowed"
             )
-        
+
         # Note: File size validation might be better handled at the endpoint level
-        # since it requires reading the file content
\ No newline at end of file
+        # since it requires reading the file content
+
+    @staticmethod
+    async def read_upload(pdf_file, max_bytes: int) -> Tuple[bytes, str]:
+        """
+        Read an uploaded file in chunks, hashing it on the way in.
+
+        Returns the content and its SHA-256 hex digest. Raises 413 as soon as
+        the upload exceeds `max_bytes` instead of after buffering all of it.
+        """
+        digest = hashlib.sha256()
+        parts = []
+        size = 0
+        while chunk := await pdf_file.read(UPLOAD_READ_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File too large (max {max_bytes // (1024 * 1024)}MB)"
+                )
+            digest.update(chunk)
+            parts.append(chunk)
+        return b"".join(parts), digest.hexdigest()
@@ -0,0 +1,166 @@
+from array import array
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+import hashlib
+import json
+import os
+import threading
+import time
+
+# 0 disables a cache
+QUERY_EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("QUERY_EMBEDDING_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+SEARCH_RESULT_CACHE_MAX_BYTES = int(os.getenv("SEARCH_RESULT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# Bounds staleness when another worker process changes a collection
+SEARCH_RESULT_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_RESULT_CACHE_TTL_SECONDS", 300))
+
+# Rough per-entry cost of the key, the OrderedDict slot and the wrappers
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+class _ByteBudgetLRU:
+    """LRU whose entries are evicted once their estimated size exceeds `max_bytes`"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, Tuple[object, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _put(self, key: Hashable, value: object, size: int) -> None:
+        with self._lock:
+            self._insert(key, value, size)
+
+    def _insert(self, key: Hashable, value: object, size: int) -> None:
+        """Add an entry and evict down to the budget; the caller holds the lock"""
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[1]
+        self._entries[key] = (value, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class QueryEmbeddingCache(_ByteBudgetLRU):
+    """
+    Embeddings of recent query texts, keyed by (model name, text).
+
+    Vectors are stored as float32 arrays, so an all-MiniLM-L6-v2 embedding
+    costs about 1.5 KB plus the query text.
+    """
+
+    def get(self, model_name: str, text: str) -> Optional[List[float]]:
+        if self.max_bytes <= 0:
+            return None
+        vector = self._get((model_name, text))
+        return vector.tolist() if vector is not None else None
+
+    def put(self, model_name: str, text: str, embedding: List[float]) -> None:
+        if self.max_bytes <= 0:
+            return
+        vector = array("f", embedding)
+        self._put(
+            (model_name, text),
+            vector,
+            len(text) + vector.itemsize * len(vector) + _ENTRY_OVERHEAD_BYTES
+        )
+
+
+class SearchResultCache(_ByteBudgetLRU):
+    """
+    Top-k results of recent searches per collection, keyed by
+    (collection, query embedding hash, k, filter).
+
+    A collection's entries are dropped whenever it is written to. Every
+    collection has a version that the write bumps, and a search that started
+    before the write does not store its results.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        super().__init__(max_bytes)
+        self.ttl_seconds = ttl_seconds
+        self._versions: Dict[Hashable, int] = {}
+
+    @staticmethod
+    def make_key(embedding: List[float], k: int, where: Optional[Dict] = None) -> Tuple[str, int, str]:
+        digest = hashlib.sha256(array("f", embedding).tobytes()).hexdigest()
+        return digest, k, json.dumps(where, sort_keys=True) if where else ""
+
+    def version(self, scope: Hashable) -> int:
+        with self._lock:
+            return self._versions.get(scope, 0)
+
+    def get(self, scope: Hashable, key: tuple) -> Optional[List[Dict]]:
+        if self.max_bytes <= 0:
+            return None
+        entry = self._get((scope, key))
+        if entry is None:
+            return None
+        expires_at, results = entry
+        if expires_at <= time.monotonic():
+            with self._lock:
+                self._remove((scope, key))
+                # Counted as a hit by _get
+                self.hits -= 1
+                self.misses += 1
+            return None
+        # Callers get their own dicts, the cached list is never handed out
+        return [dict(doc) for doc in results]
+
+    def put(self, scope: Hashable, key: tuple, results: List[Dict], version: int) -> None:
+        if self.max_bytes <= 0:
+            return
+        size = len(json.dumps(results, default=str)) + _ENTRY_OVERHEAD_BYTES
+        value = (time.monotonic() + self.ttl_seconds, [dict(doc) for doc in results])
+        with self._lock:
+            if self._versions.get(scope, 0) == version:
+                self._insert((scope, key), value, size)
+
+    def invalidate(self, scope: Hashable) -> None:
+        """Drop a collection's results after it was modified"""
+        with self._lock:
+            self._versions[scope] = self._versions.get(scope, 0) + 1
+            for key in [key for key in self._entries if key[0] == scope]:
+                self._remove(key)
+
+
+query_embedding_cache = QueryEmbeddingCache(max_bytes=QUERY_EMBEDDING_CACHE_MAX_BYTES)
+search_result_cache = SearchResultCache(
+    max_bytes=SEARCH_RESULT_CACHE_MAX_BYTES,
+    ttl_seconds=SEARCH_RESULT_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from typing import Dict, List, Sequence
+import logging
+import os
+import threading
+
+
+class CrossEncoderReranker:
+    """
+    Re-ranks retrieved chunks with a local CPU cross-encoder.
+
+    All (query, chunk) pairs that are not already cached are scored in one
+    batched forward pass. Scores are cached in a bounded LRU keyed by
+    (namespace, query, chunk id), so follow-up questions and retries reuse them.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        batch_size: int = 32,
+        cache_size: int = 10_000
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._model = None
+        self._lock = threading.Lock()
+        self._scores: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _get_model(self):
+        """Load the cross-encoder once per worker"""
+        with self._lock:
+            if self._model is None:
+                try:
+                    from sentence_transformers import CrossEncoder
+                except ImportError:
+                    raise ValueError(
+                        "The sentence_transformers python package is required for re-ranking"
+                    )
+                self._model = CrossEncoder(self.model_name, device="cpu")
+            return self._model
+
+    def rerank(self, query: str, candidates: Sequence[Dict], top_n: int, namespace: str = "") -> List[Dict]:
+        """Return the `top_n` candidates by cross-encoder score, adding `rerank_score`"""
+        if not candidates:
+            return []
+        keys = [(namespace, query, doc.get("id") or doc["document"]) for doc in candidates]
+
+        scores: Dict[tuple, float] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._scores:
+                    self._scores.move_to_end(key)
+                    scores[key] = self._scores[key]
+            self.hits += len(scores)
+            self.misses += len(keys) - len(scores)
+
+        missing = [(key, doc) for key, doc in zip(keys, candidates) if key not in scores]
+        if missing:
+            try:
+                predicted = self._get_model().predict(
+                    [(query, doc["document"]) for _, doc in missing],
+                    batch_size=self.batch_size
+                )
+            except Exception as e:
+                logging.error(f"Re-ranking failed: {str(e)}")
+                raise
+            with self._lock:
+                for (key, _), score in zip(missing, predicted):
+                    scores[key] = float(score)
+                    self._scores[key] = float(score)
+                while len(self._scores) > self.cache_size:
+                    self._scores.popitem(last=False)
+
+        ranked = sorted(
+            ({**doc, "rerank_score": scores[key]} for key, doc in zip(keys, candidates)),
+            key=lambda doc: doc["rerank_score"],
+            reverse=True
+        )
+        return ranked[:top_n]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._scores)}
+
+
+reranker = CrossEncoderReranker(
+    model_name=os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+    batch_size=int(os.getenv("RERANKER_BATCH_SIZE", 32)),
+    cache_size=int(os.getenv("RERANKER_CACHE_SIZE", 10_000))
+)
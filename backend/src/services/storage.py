@@ -0,0 +1,201 @@
+from abc import ABC, abstractmethod
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Optional
+import logging
+import os
+import threading
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from .executors import run_background, run_blocking
+
+# Which backend stores uploaded PDFs: "s3", "local" or "memory"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "s3")
+LOCAL_STORAGE_PATH = os.getenv("LOCAL_STORAGE_PATH", "uploads")
+# Connection pool and multipart settings of the shared S3 client
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", 20))
+S3_MULTIPART_THRESHOLD_MB = int(os.getenv("S3_MULTIPART_THRESHOLD_MB", 8))
+S3_MULTIPART_CHUNK_MB = int(os.getenv("S3_MULTIPART_CHUNK_MB", 8))
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", 4))
+
+
+class StorageError(Exception):
+    """Raised when an object cannot be stored or deleted"""
+
+
+class Storage(ABC):
+    """
+    Async interface for the object store holding uploaded PDFs.
+
+    Backends do their blocking work on the "storage" executor pool, so uploads
+    and deletes never stall the event loop. Uploads only happen in background
+    ingestion jobs, so they wait for a free worker instead of being rejected.
+    """
+
+    @abstractmethod
+    async def upload(self, key: str, data: bytes, content_type: str = "application/pdf") -> str:
+        """Store `data` under `key` and return its URL"""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Delete an object; missing objects are ignored"""
+
+
+class S3Storage(Storage):
+    """
+    S3 backend sharing one thread-safe boto3 client per worker process.
+
+    The client keeps a pool of S3_MAX_POOL_CONNECTIONS connections. Files above
+    the multipart threshold are uploaded in parts, S3_MAX_CONCURRENCY at a time.
+    Set `endpoint_url` to run against a local stand-in such as moto or MinIO.
+    """
+
+    def __init__(
+        self,
+        bucket: Optional[str],
+        region: Optional[str] = None,
+        endpoint_url: Optional[str] = None,
+        max_pool_connections: int = S3_MAX_POOL_CONNECTIONS,
+        multipart_threshold: int = S3_MULTIPART_THRESHOLD_MB * 1024 * 1024,
+        multipart_chunksize: int = S3_MULTIPART_CHUNK_MB * 1024 * 1024,
+        max_concurrency: int = S3_MAX_CONCURRENCY
+    ):
+        self.bucket = bucket
+        self.region = region
+        self.endpoint_url = endpoint_url
+        self.max_pool_connections = max_pool_connections
+        self.multipart_threshold = multipart_threshold
+        self.multipart_chunksize = multipart_chunksize
+        self.max_concurrency = max_concurrency
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        """Create the pooled client on first use"""
+        with self._lock:
+            if self._client is None:
+                self._client = boto3.session.Session().client(
+                    "s3",
+                    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+                    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+                    region_name=self.region,
+                    endpoint_url=self.endpoint_url,
+                    config=Config(
+                        max_pool_connections=self.max_pool_connections,
+                        retries={"max_attempts": 3, "mode": "standard"}
+                    )
+                )
+            return self._client
+
+    def _transfer_config(self) -> TransferConfig:
+        return TransferConfig(
+            multipart_threshold=self.multipart_threshold,
+            multipart_chunksize=self.multipart_chunksize,
+            max_concurrency=self.max_concurrency,
+            use_threads=True
+        )
+
+    def url(self, key: str) -> str:
+        if self.endpoint_url:
+            return f"{self.endpoint_url.rstrip('/')}/{self.bucket}/{key}"
+        return f"https://{self.bucket}.s3.amazonaws.com/{key}"
+
+    async def upload(self, key: str, data: bytes, content_type: str = "application/pdf") -> str:
+        try:
+            await run_background("storage",
+                self._get_client().upload_fileobj,
+                BytesIO(data),
+                self.bucket,
+                key,
+                ExtraArgs={"ContentType": content_type},
+                Config=self._transfer_config()
+            )
+        except (BotoCoreError, ClientError) as e:
+            raise StorageError(f"S3 upload failed: {str(e)}") from e
+        return self.url(key)
+
+    async def delete(self, key: str) -> None:
+        try:
+            await run_blocking("storage", self._get_client().delete_object, Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "NoSuchKey":
+                return
+            raise StorageError(f"S3 deletion failed: {str(e)}") from e
+        except BotoCoreError as e:
+            raise StorageError(f"S3 deletion failed: {str(e)}") from e
+
+
+class LocalStorage(Storage):
+    """Filesystem backend for development and tests"""
+
+    def __init__(self, root: str = LOCAL_STORAGE_PATH):
+        self.root = Path(root).resolve()
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root not in path.parents:
+            raise StorageError(f"Invalid storage key: {key}")
+        return path
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+    async def upload(self, key: str, data: bytes, content_type: str = "application/pdf") -> str:
+        path = self._path(key)
+        try:
+            await run_background("storage", self._write, path, data)
+        except OSError as e:
+            raise StorageError(f"Local upload failed: {str(e)}") from e
+        return path.as_uri()
+
+    async def delete(self, key: str) -> None:
+        try:
+            await run_blocking("storage", self._path(key).unlink, missing_ok=True)
+        except OSError as e:
+            raise StorageError(f"Local deletion failed: {str(e)}") from e
+
+
+class MemoryStorage(Storage):
+    """In-process backend; objects are kept in a dict"""
+
+    def __init__(self):
+        self.objects: Dict[str, bytes] = {}
+
+    async def upload(self, key: str, data: bytes, content_type: str = "application/pdf") -> str:
+        self.objects[key] = data
+        return f"memory://{key}"
+
+    async def delete(self, key: str) -> None:
+        self.objects.pop(key, None)
+
+
+_storage: Optional[Storage] = None
+
+
+def get_storage() -> Storage:
+    """Return the worker's storage backend, selected by STORAGE_BACKEND"""
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND == "local":
+            _storage = LocalStorage()
+        elif STORAGE_BACKEND == "memory":
+            _storage = MemoryStorage()
+        else:
+            if STORAGE_BACKEND != "s3":
+                logging.error(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r}, using s3")
+            _storage = S3Storage(
+                bucket=os.getenv("AWS_S3_BUCKET"),
+                region=os.getenv("AWS_REGION"),
+                endpoint_url=os.getenv("AWS_S3_ENDPOINT_URL")
+            )
+    return _storage
+
+
+def set_storage(storage: Storage) -> None:
+    """Replace the storage backend, e.g. with a MemoryStorage in tests"""
+    global _storage
+    _storage = storage
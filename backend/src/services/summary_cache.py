@@ -0,0 +1,107 @@
+from typing import Dict, Optional
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+
+class SummaryCache:
+    """
+    Persistent cache of intermediate (per-section) and final document summaries.
+
+    Entries are keyed by (model name, document hash, section key), so retries and
+    re-ingestion of the same document do not pay for the LLM calls twice. When
+    the cache grows past `max_entries`, the oldest entries are evicted.
+
+    Calls block on SQLite; async callers run them on an executor pool.
+    """
+
+    def __init__(self, path: str = "summary_cache.sqlite3", max_entries: int = 50_000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._entries = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the cache database on first use"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                " model TEXT NOT NULL,"
+                " doc_hash TEXT NOT NULL,"
+                " section TEXT NOT NULL,"
+                " summary TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " PRIMARY KEY (model, doc_hash, section))"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_summaries_created_at ON summaries (created_at)"
+            )
+            self._entries = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        return self._conn
+
+    @staticmethod
+    def hash_document(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, model: str, doc_hash: str, section: str) -> Optional[str]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT summary FROM summaries WHERE model = ? AND doc_hash = ? AND section = ?",
+                (model, doc_hash, section)
+            ).fetchone()
+            if row:
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, model: str, doc_hash: str, section: str, summary: str) -> None:
+        """Store a summary and evict the oldest entries if over the limit"""
+        with self._lock:
+            conn = self._connect()
+            exists = conn.execute(
+                "SELECT 1 FROM summaries WHERE model = ? AND doc_hash = ? AND section = ?",
+                (model, doc_hash, section)
+            ).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries (model, doc_hash, section, summary, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (model, doc_hash, section, summary, time.time())
+            )
+            self._entries += not exists
+            if self._entries > self.max_entries:
+                # Evict down to 90% of the limit so eviction does not run on every insert
+                excess = self._entries - int(self.max_entries * 0.9)
+                conn.execute(
+                    "DELETE FROM summaries WHERE rowid IN "
+                    "(SELECT rowid FROM summaries ORDER BY created_at ASC LIMIT ?)",
+                    (excess,)
+                )
+                self._entries -= excess
+                self.evictions += excess
+                logging.info(f"Summary cache evicted {excess} entries")
+            conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": self._entries,
+                "max_entries": self.max_entries,
+            }
+
+
+summary_cache = SummaryCache(
+    path=os.getenv("SUMMARY_CACHE_PATH", "summary_cache.sqlite3"),
+    max_entries=int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", 50_000))
+)
@@ -1,7 +1,10 @@
+from typing import Iterable, Iterator, List
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
 class TextChunker:
     def __init__(self, chunk_size=1000, chunk_overlap=200):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
         self.splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
@@ -10,4 +13,51 @@ class TextChunker:
 
     def chunk_text(self, text: str) -> list[str]:
         """Split text into chunks."""
-        return self.splitter.split_text(text)
\ No newline at end of file
+        return self.splitter.split_text(text)
+
+    def stream(self) -> "ChunkStream":
+        """Start an incremental chunking session."""
+        return ChunkStream(self)
+
+    def iter_chunks(self, pieces: Iterable[str]) -> Iterator[str]:
+        """Split a stream of text pieces (e.g. pages) into chunks as they fill up."""
+        stream = self.stream()
+        for piece in pieces:
+            yield from stream.feed(piece)
+        yield from stream.flush()
+
+
+class ChunkStream:
+    """
+    Incremental chunker that emits chunks as soon as they are complete.
+
+    Text is buffered until it holds a few chunks' worth, split, and every chunk
+    except the last is emitted. The last chunk stays in the buffer so that the
+    next split carries the configured overlap across piece (page) boundaries,
+    keeping the buffer bounded regardless of document size.
+    """
+
+    def __init__(self, chunker: TextChunker, buffer_chunks: int = 4):
+        self.chunker = chunker
+        self.buffer_limit = chunker.chunk_size * buffer_chunks
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Add text and return the chunks that are complete so far."""
+        if not text:
+            return []
+        self._buffer = f"{self._buffer}\n{text}" if self._buffer else text
+        if len(self._buffer) < self.buffer_limit:
+            return []
+        chunks = self.chunker.chunk_text(self._buffer)
+        if not chunks:
+            self._buffer = ""
+            return []
+        self._buffer = chunks[-1]
+        return chunks[:-1]
+
+    def flush(self) -> List[str]:
+        """Return the remaining chunks at the end of the stream."""
+        chunks = self.chunker.chunk_text(self._buffer) if self._buffer else []
+        self._buffer = ""
+        return chunks
@@ -0,0 +1,36 @@
+from typing import Optional
+import logging
+import os
+import re
+
+_WORD_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+class TokenCounter:
+    """
+    Counts tokens locally, without calling the LLM provider.
+
+    Uses a Hugging Face `tokenizers` tokenizer.json when TOKENIZER_PATH points to
+    one (e.g. the tokenizer of the embedding model); otherwise falls back to
+    counting words and punctuation marks, which tracks subword tokenizers closely
+    enough for budgeting prompts.
+    """
+
+    def __init__(self, tokenizer_path: Optional[str] = None):
+        self._tokenizer = None
+        if tokenizer_path:
+            try:
+                from tokenizers import Tokenizer
+                self._tokenizer = Tokenizer.from_file(tokenizer_path)
+            except Exception as e:
+                logging.error(f"Failed to load tokenizer from {tokenizer_path}: {str(e)}")
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._tokenizer is not None:
+            return len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+        return len(_WORD_PATTERN.findall(text))
+
+
+token_counter = TokenCounter(os.getenv("TOKENIZER_PATH"))
@@ -1,11 +1,111 @@
 from typing import List, Dict, Optional
+from collections import OrderedDict
+import asyncio
 import logging
+import os
+import threading
 import chromadb
 from chromadb.utils import embedding_functions
+from .embedding_batcher import embedding_batcher
+from .embedding_cache import embedding_cache
+from .executors import run_background, run_blocking
+from .lexical_index import lexical_index, reciprocal_rank_fusion
+from .query_cache import query_embedding_cache, search_result_cache
+
+
+class VectorStoreRegistry:
+    """
+    Process-wide cache of Chroma clients, embedding functions and open
+    per-project collection handles.
+
+    Each worker keeps one PersistentClient per persist directory and one loaded
+    embedding model per model name. Collection handles are kept in an LRU of at
+    most `max_collections` entries; the least recently used handle is dropped
+    when the limit is reached.
+    """
+
+    def __init__(self, max_collections: int = 64):
+        self.max_collections = max_collections
+        self._clients: Dict[str, object] = {}
+        self._embedding_functions: Dict[str, object] = {}
+        self._collections: OrderedDict = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_client(self, persist_directory: str):
+        """Return the shared Chroma client for a persist directory"""
+        with self._lock:
+            client = self._clients.get(persist_directory)
+            if client is None:
+                client = chromadb.PersistentClient(path=persist_directory)
+                self._clients[persist_directory] = client
+            return client
+
+    def get_embedding_function(self, model_name: str):
+        """Return the shared embedding function, loading the model only once"""
+        with self._lock:
+            embedding_func = self._embedding_functions.get(model_name)
+            if embedding_func is None:
+                embedding_func = embedding_functions.SentenceTransformerEmbeddingFunction(
+                    model_name=model_name
+                )
+                self._embedding_functions[model_name] = embedding_func
+            return embedding_func
+
+    def register_embedding_function(self, model_name: str, embedding_func) -> None:
+        """Use a preloaded embedding function for a model name (e.g. offline benchmarks)"""
+        with self._lock:
+            self._embedding_functions[model_name] = embedding_func
+
+    def get_collection(self, persist_directory: str, collection_name: str, model_name: str):
+        """Return an open collection handle, creating it on a cache miss"""
+        key = (persist_directory, collection_name)
+        with self._lock:
+            collection = self._collections.get(key)
+            if collection is not None:
+                self._collections.move_to_end(key)
+                self.hits += 1
+                return collection
+
+            self.misses += 1
+            collection = self.get_client(persist_directory).get_or_create_collection(
+                name=collection_name,
+                embedding_function=self.get_embedding_function(model_name),
+                metadata={"hnsw:space": "cosine"}
+            )
+            self._collections[key] = collection
+            while len(self._collections) > self.max_collections:
+                self._collections.popitem(last=False)
+                self.evictions += 1
+            return collection
+
+    def evict_collection(self, persist_directory: str, collection_name: str) -> None:
+        """Drop a cached collection handle (e.g. after the collection is deleted)"""
+        with self._lock:
+            self._collections.pop((persist_directory, collection_name), None)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss/eviction counters and current size of the collection LRU"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._collections),
+                "max_size": self.max_collections,
+            }
+
+
+vector_store_registry = VectorStoreRegistry(
+    max_collections=int(os.getenv("VECTOR_STORE_MAX_COLLECTIONS", 64))
+)
+
 
 class VectorStore:
     def __init__(
-        self, 
+        self,
         project_id: str,
         collection_name: str = "documents",
         persist_directory: str = "chroma_db",
@@ -17,61 +117,141 @@ class VectorStore:
         self.embedding_model_name = embedding_model_name
         self.client = self._initialize_client()
         self.collection = self._get_or_create_collection()
-    
+
     def _initialize_client(self):
-        """Initialize connection to ChromaDB"""
+        """Get the shared connection to ChromaDB"""
         try:
-            return chromadb.PersistentClient(path=self.persist_directory)
+            return vector_store_registry.get_client(self.persist_directory)
         except Exception as e:
             logging.error(f"Failed to initialize Chroma client: {str(e)}")
             raise
-        
+
     def _get_collection_name(self):
         """Generate collection name combining project ID and base name"""
         return f"{self.project_id}_{self.base_collection_name}"
-        
+
+    @property
+    def _cache_scope(self) -> tuple:
+        """Key of this collection in the search result cache"""
+        return (self.persist_directory, self._get_collection_name())
+
     def _get_or_create_collection(self):
-        """Get or create a collection with embedding function"""
+        """Get or create a collection with the shared embedding function"""
         try:
-            embedding_func = embedding_functions.SentenceTransformerEmbeddingFunction(
+            return vector_store_registry.get_collection(
+                persist_directory=self.persist_directory,
+                collection_name=self._get_collection_name(),
                 model_name=self.embedding_model_name
             )
-            return self.client.get_or_create_collection(
-                name=self._get_collection_name(),
-                embedding_function=embedding_func,
-                metadata={"hnsw:space": "cosine"}
-            )
         except Exception as e:
             logging.error(f"Failed to get/create collection: {str(e)}")
             raise
 
-    async def add_texts(self, texts: List[str], metadatas: List[Dict], ids: Optional[List[str]] = None) -> None:
-        """Store text chunks in vector database with metadata"""
+    def _embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, computing only the ones missing from the embedding cache"""
+        vectors = embedding_cache.get_many(self.embedding_model_name, texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            embedding_func = vector_store_registry.get_embedding_function(self.embedding_model_name)
+            missing_texts = [texts[i] for i in missing]
+            computed = [list(map(float, vector)) for vector in embedding_func(missing_texts)]
+            embedding_cache.put_many(self.embedding_model_name, missing_texts, computed)
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+        return vectors
+
+    async def add_texts(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        ids: Optional[List[str]] = None,
+        embeddings: Optional[List[List[float]]] = None
+    ) -> None:
+        """Store text chunks in vector database with metadata, embedding them unless `embeddings` is given"""
         try:
-            self.collection.add(
-                documents=texts,
-                metadatas=metadatas,
-                ids=ids if ids else [str(i) for i in range(len(texts))]
-            )
+            ids = ids if ids else [str(i) for i in range(len(texts))]
+            # Embedding and the collection write run on the "embedding" pool.
+            # Chunks are only added by ingestion jobs, which have no client to
+            # retry a 503, so they wait for a free worker instead.
+            await run_background("embedding", self._add, texts, metadatas, ids, embeddings)
         except Exception as e:
             logging.error(f"Vector storage failed: {str(e)}")
             raise
 
+    def _add(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        ids: List[str],
+        embeddings: Optional[List[List[float]]]
+    ) -> None:
+        self.collection.add(
+            documents=texts,
+            embeddings=embeddings if embeddings is not None else self._embed_documents(texts),
+            metadatas=metadatas,
+            ids=ids
+        )
+        # Keep the BM25 index in sync with the collection
+        try:
+            lexical_index.add_documents(str(self.project_id), ids, texts)
+        except Exception:
+            self.collection.delete(ids=ids)
+            raise
+        finally:
+            search_result_cache.invalidate(self._cache_scope)
+
     def similarity_search(self, query: str, k: int = 4) -> List[Dict]:
         """Search for similar documents"""
+        return self._query(query_texts=[query], n_results=k)
+
+    def search_by_embedding(self, embedding: List[float], k: int = 4, where: Optional[Dict] = None) -> List[Dict]:
+        """Search for the documents nearest to an already computed query embedding"""
+        if where:
+            return self._query(query_embeddings=[embedding], n_results=k, where=where)
+        return self._query(query_embeddings=[embedding], n_results=k)
+
+    async def embed_query(self, query: str) -> List[float]:
+        """Embed a query, reusing a recent embedding of the same text or batching it with concurrent queries"""
+        embedding = query_embedding_cache.get(self.embedding_model_name, query)
+        if embedding is None:
+            embedding = await embedding_batcher.embed(
+                self.embedding_model_name,
+                vector_store_registry.get_embedding_function(self.embedding_model_name),
+                query
+            )
+            query_embedding_cache.put(self.embedding_model_name, query, embedding)
+        return embedding
+
+    async def dense_search(self, query: str, k: int = 4, where: Optional[Dict] = None) -> List[Dict]:
+        """
+        similarity_search for request handlers: batched, cached query embedding,
+        then the index lookup unless the same search was answered since the
+        collection last changed.
+        """
+        embedding = await self.embed_query(query)
+        key = search_result_cache.make_key(embedding, k, where)
+        results = search_result_cache.get(self._cache_scope, key)
+        if results is None:
+            version = search_result_cache.version(self._cache_scope)
+            results = await run_blocking("embedding", self.search_by_embedding, embedding, k, where)
+            search_result_cache.put(self._cache_scope, key, results, version)
+        return results
+
+    def _query(self, **query) -> List[Dict]:
         try:
             results = self.collection.query(
-                query_texts=[query],
-                n_results=k,
-                include=["documents", "metadatas", "distances"]
+                include=["documents", "metadatas", "distances"],
+                **query
             )
             return [
                 {
+                    "id": doc_id,
                     "document": doc,
                     "metadata": meta,
                     "score": 1 - dist
                 }
-                for doc, meta, dist in zip(
+                for doc_id, doc, meta, dist in zip(
+                    results["ids"][0],
                     results["documents"][0],
                     results["metadatas"][0],
                     results["distances"][0]
@@ -81,10 +261,91 @@ class VectorStore:
             logging.error(f"Similarity search failed: {str(e)}")
             raise
 
+    def lexical_search(self, query: str, k: int = 4) -> List[Dict]:
+        """Search the project's BM25 index for exact terms and identifiers"""
+        try:
+            ranked = lexical_index.search(str(self.project_id), query, k)
+            if not ranked:
+                return []
+            results = self.collection.get(
+                ids=[doc_id for doc_id, _ in ranked],
+                include=["documents", "metadatas"]
+            )
+            found = {
+                doc_id: (doc, meta)
+                for doc_id, doc, meta in zip(results["ids"], results["documents"], results["metadatas"])
+            }
+            return [
+                {
+                    "id": doc_id,
+                    "document": found[doc_id][0],
+                    "metadata": found[doc_id][1],
+                    "score": score
+                }
+                for doc_id, score in ranked
+                if doc_id in found
+            ]
+        except Exception as e:
+            logging.error(f"Lexical search failed: {str(e)}")
+            raise
+
+    async def hybrid_search(self, query: str, k: int = 4, candidate_k: Optional[int] = None) -> List[Dict]:
+        """
+        Run dense and BM25 retrieval concurrently and fuse them with reciprocal
+        rank fusion. Each retriever contributes its top `candidate_k` results
+        (3 * k by default); the fused score replaces the similarity score.
+        """
+        candidate_k = candidate_k or k * 3
+        dense, lexical = await asyncio.gather(
+            self.dense_search(query, candidate_k),
+            run_blocking("embedding", self.lexical_search, query, candidate_k)
+        )
+        by_id = {doc["id"]: doc for doc in lexical}
+        by_id.update({doc["id"]: doc for doc in dense})
+        fused = reciprocal_rank_fusion([
+            [doc["id"] for doc in dense],
+            [doc["id"] for doc in lexical]
+        ])
+        return [{**by_id[doc_id], "score": score} for doc_id, score in fused[:k]]
+
+    def get_document_chunks(self, document_id: int) -> List[Dict]:
+        """Return the chunks of one document with their embeddings, in chunk order"""
+        try:
+            results = self.collection.get(
+                where={"document_id": document_id},
+                include=["documents", "metadatas", "embeddings"]
+            )
+            chunks = [
+                {"document": doc, "metadata": meta, "embedding": list(embedding)}
+                for doc, meta, embedding in zip(
+                    results["documents"], results["metadatas"], results["embeddings"]
+                )
+            ]
+            return sorted(chunks, key=lambda chunk: chunk["metadata"].get("chunk_index", 0))
+        except Exception as e:
+            logging.error(f"Failed to read document vectors: {str(e)}")
+            raise
+
+    def delete_document(self, document_id: int) -> int:
+        """Delete only the vectors of one document; returns how many were removed"""
+        try:
+            ids = self.collection.get(where={"document_id": document_id}, include=[])["ids"]
+            if ids:
+                self.collection.delete(ids=ids)
+                lexical_index.delete_documents(str(self.project_id), ids)
+                search_result_cache.invalidate(self._cache_scope)
+            return len(ids)
+        except Exception as e:
+            logging.error(f"Failed to delete document vectors: {str(e)}")
+            raise
+
     def delete_project_collection(self):
         """Delete the entire collection for this project"""
         try:
+            vector_store_registry.evict_collection(self.persist_directory, self._get_collection_name())
             self.client.delete_collection(name=self._get_collection_name())
+            lexical_index.delete_project(str(self.project_id))
+            search_result_cache.invalidate(self._cache_scope)
         except Exception as e:
             logging.error(f"Failed to delete collection: {str(e)}")
-            raise
\ No newline at end of file
+            raise
@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+from src.services.answer_cache import AnswerCache, answered_turns
+
+OPTIONS = {"top_k": 4}
+
+
+def chat(sender_type: str, message: str) -> SimpleNamespace:
+    return SimpleNamespace(sender_type=sender_type, message=message)
+
+
+def key(query: str, history: list, summary: str = None, max_turns: int = 8) -> str:
+    return AnswerCache.make_key(query, OPTIONS, answered_turns(query, history, max_turns), summary)
+
+
+def test_follow_up_in_different_conversations_gets_different_keys():
+    payment = [chat("USER", "When is payment due?"), chat("SYSTEM", "Within 30 days.")]
+    notice = [chat("USER", "How long is the notice period?"), chat("SYSTEM", "Three months.")]
+
+    assert key("Why?", payment) != key("Why?", notice)
+
+
+def test_conversation_summary_is_part_of_the_key():
+    history = [chat("USER", "When is payment due?"), chat("SYSTEM", "Within 30 days.")]
+
+    assert key("Why?", history, summary="About payments") != key("Why?", history, summary="About notice")
+
+
+def test_sequential_repeat_gets_the_same_key():
+    history = [chat("SYSTEM", "Document summary")]
+    first = key("When is payment due?", history)
+
+    history += [chat("USER", "When is payment due?"), chat("SYSTEM", "Within 30 days.")]
+    second = key("when is payment due", history)
+
+    history += [chat("USER", "When is payment due?"), chat("SYSTEM", "Within 30 days.")]
+    assert first == second == key("When is payment due?", history)
+
+
+def test_pending_question_is_left_out_of_the_key():
+    history = [chat("USER", "When is payment due?"), chat("SYSTEM", "Within 30 days.")]
+
+    assert key("Why?", history) == key("Why?", history + [chat("USER", "Why?")])
+
+
+def test_new_turns_after_a_repeat_change_the_key():
+    history = [chat("USER", "When is payment due?"), chat("SYSTEM", "Within 30 days.")]
+    first = key("Why?", history)
+
+    history += [chat("USER", "Why?"), chat("SYSTEM", "Because."), chat("USER", "Who pays?"), chat("SYSTEM", "The tenant.")]
+    assert key("Why?", history) != first
+
+
+def test_zero_turns_ignores_the_conversation():
+    assert answered_turns("Why?", [chat("USER", "When is payment due?"), chat("SYSTEM", "Within 30 days.")], 0) == []